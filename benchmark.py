@@ -0,0 +1,289 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+# Benchmark of the search core. Every (map, algorithm, heuristic) runs its warmup and timed repetitions
+# in a fresh process each, without logging, replay files, the solution cache or checkpoints, so the numbers
+# only cover the search. Settings come from the "benchmark" attribute of config.json
+
+STEPS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+# Random room that is solvable by construction: boxes start on the objectives
+# and the player walks backwards from there, pulling boxes along the way
+def generate_grid(name, seed, width, height, box_count, pulls, pull_chance=0.7):
+    rng = random.Random(seed)
+    walls = [[row in (0, height - 1) or column in (0, width - 1) or rng.random() < 0.12 for column in range(width)] for row in range(height)]
+    floor = [(row, column) for row in range(height) for column in range(width) if not walls[row][column]]
+    # Keep the largest connected area, the rest is filled in
+    areas = []
+    seen = set()
+    for start in floor:
+        if start in seen:
+            continue
+        area = [start]
+        seen.add(start)
+        for row, column in area:
+            for step_row, step_column in STEPS:
+                neighbour = (row + step_row, column + step_column)
+                if not walls[neighbour[0]][neighbour[1]] and neighbour not in seen:
+                    seen.add(neighbour)
+                    area.append(neighbour)
+        areas.append(area)
+    floor = max(areas, key=len)
+    for row in range(height):
+        for column in range(width):
+            walls[row][column] = (row, column) not in floor
+    objectives = set(rng.sample(floor, box_count))
+    boxes = set(objectives)
+    player = rng.choice([cell for cell in floor if cell not in boxes])
+    moves = 0
+    for _ in range(pulls * 20):
+        if moves >= pulls and player not in objectives:
+            break
+        step_row, step_column = rng.choice(STEPS)
+        target = (player[0] + step_row, player[1] + step_column)
+        if walls[target[0]][target[1]] or target in boxes:
+            continue
+        behind = (player[0] - step_row, player[1] - step_column)
+        if behind in boxes and rng.random() < pull_chance:
+            boxes.remove(behind)
+            boxes.add(player)
+        player = target
+        moves += 1
+    if player in objectives:
+        # Boxed in on an objective, which the grid format can't show
+        return generate_grid(name, seed + 1000, width, height, box_count, pulls, pull_chance)
+    grid = []
+    for row in range(height):
+        line = ""
+        for column in range(width):
+            cell = (row, column)
+            if walls[row][column]:
+                line += "#"
+            elif cell == player:
+                line += "@"
+            elif cell in boxes:
+                line += ":" if cell in objectives else "$"
+            else:
+                line += "." if cell in objectives else " "
+        grid.append(line)
+    return {"name": name, "grid": grid}
+
+def benchmark_grids(settings):
+    with open('grid.json') as f:
+        grids = [grid for grid in json.load(f)['active'] if grid['name'] in settings['maps']]
+    for i, generated in enumerate(settings['generated']):
+        grids.append(generate_grid(f"G-{i + 1}", generated['seed'], generated['width'], generated['height'], generated['boxes'], generated['pulls'], generated['pull_chance']))
+    return grids
+
+# Runs in its own process, puts (wall, cpu, expanded nodes, cost, peak rss in MB) in results
+def run_once(grid, algorithm, heuristic, results):
+    import solver
+    from grid_aux import load_grid
+    solver.cache_config = {"enabled": False}
+    grid_data = load_grid(grid)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    data = solver.initialize_tree(grid_data, algorithm, heuristic)
+    node, solved = None, False
+    while not solved and data.frontier_node_count > 0:
+        node, solved = solver.algorithm_step(grid_data, data)
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    data.close()
+    results.put((wall, cpu, data.expanded_node_count, node.depth if solved else None, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+# Successors per second of the move generation of each search mode, over the first sample states a BFS of the grid expands.
+# Each mode runs in a fresh process, the best of repetitions passes over the sample is kept
+def successor_rate(grid, search_mode, sample, repetitions, results):
+    import solver
+    from grid_aux import load_grid
+    solver.cache_config = {"enabled": False}
+    solver.search_mode = search_mode
+    grid_data = load_grid(grid)
+    data = solver.initialize_tree(grid_data, 'bfs', 1)
+    nodes = []
+    solved = False
+    while len(nodes) < sample and not solved and data.frontier_node_count > 0:
+        node, solved = solver.algorithm_step(grid_data, data)
+        nodes.append(node)
+    data.close()
+    explore = solver.explore_pushes if search_mode == 'push' else solver.explore_node
+    best = float('inf')
+    for _ in range(repetitions):
+        start = time.process_time()
+        successors = sum(len(explore(node, grid_data)) for node in nodes)
+        best = min(best, time.process_time() - start)
+    results.put((len(nodes), successors, successors / best if best > 0 else 0))
+
+def successor_benchmark(settings):
+    context = multiprocessing.get_context('spawn')
+    print(f"{'map':<8}{'mode':<6}{'states':>8}{'successors':>12}{'successors/s':>14}")
+    for grid in benchmark_grids(settings):
+        for search_mode in ['step', 'push']:
+            results = context.Queue()
+            process = context.Process(target=successor_rate, args=(grid, search_mode, settings['successors']['sample'], settings['successors']['repetitions'], results))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                print(f"{grid['name']:<8}{search_mode:<6}  failed")
+                continue
+            states, successors, rate = results.get()
+            print(f"{grid['name']:<8}{search_mode:<6}{states:>8}{successors:>12}{rate:>14.0f}")
+
+# Modules timed on a cold start: the headless solver, the entry point without replays, and the ones that load arcade,
+# pandas and matplotlib, which only replays and the results analysis need
+STARTUP_MODULES = ['solver', 'game', 'replay', 'results']
+
+# Wall time of a fresh interpreter importing module, best of repetitions
+def import_time(module, repetitions):
+    best = float('inf')
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', f"import {module}"], check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def worker_ready(_):
+    import solver
+    return os.getpid()
+
+# Time until a pool of workers started by the spawn method, which import the solver again, answers its first tasks.
+# Best of repetitions
+def spawn_time(workers, repetitions):
+    context = multiprocessing.get_context('spawn')
+    best = float('inf')
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        with context.Pool(workers) as pool:
+            pool.map(worker_ready, range(workers))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def startup_benchmark(settings):
+    repetitions = settings['startup']['repetitions']
+    print(f"{'module':<10}{'cold start (s)':>16}")
+    for module in STARTUP_MODULES:
+        try:
+            print(f"{module:<10}{import_time(module, repetitions):>16.3f}")
+        except subprocess.CalledProcessError:
+            print(f"{module:<10}{'failed':>16}")
+    workers = settings['startup']['workers'] or os.cpu_count()
+    print(f"Spawn of {workers} solver workers: {spawn_time(workers, repetitions):.3f}s")
+
+def isolated_run(grid, algorithm, heuristic, timeout):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=run_once, args=(grid, algorithm, heuristic, results))
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return None
+    return results.get() if process.exitcode == 0 else None
+
+def measure(grid, algorithm, heuristic, settings):
+    for _ in range(settings['warmup']):
+        isolated_run(grid, algorithm, heuristic, settings['timeout'])
+    runs = []
+    for _ in range(settings['repetitions']):
+        run = isolated_run(grid, algorithm, heuristic, settings['timeout'])
+        if run is None:
+            return {"map": grid['name'], "algorithm": algorithm, "heuristic": heuristic, "timeout": True}
+        runs.append(run)
+    walls, cpus, expanded, costs, rss = zip(*runs)
+    cpu = statistics.median(cpus)
+    return {
+        "map": grid['name'],
+        "algorithm": algorithm,
+        "heuristic": heuristic,
+        "timeout": False,
+        "wall": statistics.median(walls),
+        "cpu": cpu,
+        "cpu_min": min(cpus),
+        "cpu_stdev": statistics.stdev(cpus) if len(cpus) > 1 else 0,
+        "expanded_nodes": expanded[0],
+        "nodes_per_second": expanded[0] / cpu if cpu > 0 else 0,
+        "cost": costs[0],
+        "peak_rss_mb": max(rss)
+    }
+
+def result_key(result):
+    return (result['map'], result['algorithm'], result['heuristic'])
+
+# Results whose fastest CPU time grew past the threshold (a fraction) over the baseline, or that now time out.
+# The fastest repetition is the one least disturbed by the rest of the machine, runs under min_time are too noisy to compare
+def find_regressions(results, baseline, threshold, min_time):
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get(result_key(result))
+        if before is None or before['timeout'] or before['cpu_min'] < min_time:
+            continue
+        if result['timeout'] or result['cpu_min'] > before['cpu_min'] * (1 + threshold):
+            regressions.append((result, before))
+    return regressions
+
+def print_report(results, regressions):
+    print(f"{'map':<8}{'algorithm':<10}{'h':>3}{'wall s':>10}{'cpu s':>10}{'nodes':>10}{'nodes/s':>11}{'rss MB':>9}")
+    for result in results:
+        if result['timeout']:
+            print(f"{result['map']:<8}{result['algorithm']:<10}{result['heuristic']:>3}  timeout")
+            continue
+        print(f"{result['map']:<8}{result['algorithm']:<10}{result['heuristic']:>3}{result['wall']:>10.3f}{result['cpu']:>10.3f}"
+              f"{result['expanded_nodes']:>10}{result['nodes_per_second']:>11.0f}{result['peak_rss_mb']:>9.1f}")
+    for result, before in regressions:
+        change = "timeout" if result['timeout'] else f"{result['cpu_min'] / before['cpu_min'] - 1:+.1%} cpu"
+        print(f"REGRESSION {result['map']} {result['algorithm']} {result['heuristic']}: {change} against the baseline")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the search algorithms on a fixed set of maps")
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline to compare against")
+    parser.add_argument('--successors', action='store_true', help="only measure successors generated per second")
+    parser.add_argument('--startup', action='store_true', help="only measure cold start and worker spawn times")
+    args = parser.parse_args()
+    with open('config.json') as f:
+        settings = json.load(f)['benchmark']
+    if args.successors:
+        successor_benchmark(settings)
+        return 0
+    if args.startup:
+        startup_benchmark(settings)
+        return 0
+
+    results = []
+    for grid in benchmark_grids(settings):
+        for algorithm in settings['algorithms']:
+            for heuristic in settings['heuristics']:
+                result = measure(grid, algorithm, heuristic, settings)
+                results.append(result)
+                print(f"{grid['name']} {algorithm} {heuristic}: " + ("timeout" if result['timeout'] else f"{result['cpu']:.3f}s cpu"))
+
+    baseline = []
+    if os.path.exists(settings['baseline']):
+        with open(settings['baseline']) as f:
+            baseline = json.load(f)['results']
+    regressions = find_regressions(results, baseline, settings['threshold'], settings['min_time'])
+    print_report(results, regressions)
+
+    os.makedirs(settings['directory'], exist_ok=True)
+    report = {"date": datetime.now().isoformat(), "settings": settings, "results": results,
+              "regressions": [result_key(result) for result, _ in regressions]}
+    with open(os.path.join(settings['directory'], f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"), 'w') as f:
+        json.dump(report, f, indent=4)
+    if args.save_baseline:
+        with open(settings['baseline'], 'w') as f:
+            json.dump(report, f, indent=4)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
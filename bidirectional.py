@@ -0,0 +1,118 @@
+import time
+import solver
+from solver import Direction, TreeData
+from grid_aux import GridData
+from tree import Node, NodeValue
+
+# Bidirectional breadth first search over push states (boxes and the player's region, as in push mode).
+# The forward side starts from the grid and pushes boxes, the backward side starts from the boxes on the objectives,
+# once for every region the player can be left in, and pulls them. Each round the side with the smaller frontier
+# expands a whole layer, and the search ends on the first layer that generates a state the other side has seen.
+# Finishing the layer keeps the number of pushes minimal, each side only goes about half of the way.
+
+# Backward starting states, the boxes on the objectives with the player in any area next to a box,
+# since the last push leaves the player next to the box it pushed
+def goal_nodes(grid_data: GridData):
+    boxes = tuple(sorted(grid_data.objectives))
+    regions = set()
+    nodes = []
+    for box in boxes:
+        for offset in grid_data.offsets:
+            cell = box + offset
+            if not solver.can_move_into_cell(grid_data, cell, boxes) or cell in regions:
+                continue
+            reachable = grid_data.reachable_cells(cell, set(boxes))
+            regions.update(reachable)
+            region = min(reachable)
+            nodes.append(Node(NodeValue(cell, boxes, grid_data.zobrist(region, boxes), region)))
+    return nodes
+
+# Explore all possible box pulls from a given node. Pulling a box from cell to cell - offset leaves the player at
+# cell - 2 * offset, the child is the state a push in direction of offset would start from.
+# Children store that push's direction and the player cell before it, so the route can be read forward
+def explore_pulls(node, grid_data: GridData):
+    children = []
+    boxes = node.value.boxes
+    occupied = set(boxes)
+    reachable = grid_data.reachable_cells(node.value.player, occupied)
+    for box in boxes:
+        for direction in Direction:
+            offset = grid_data.offset(direction.value)
+            box_new_position = box - offset
+            player = box_new_position - offset
+            if box_new_position not in reachable or not solver.can_move_into_cell(grid_data, player, occupied):
+                continue
+            new_boxes = solver.move_box(boxes, box, box_new_position)
+            region = min(grid_data.reachable_cells(player, set(new_boxes)))
+            key = node.value.key ^ grid_data.zobrist_player[node.value.region] ^ grid_data.zobrist_player[region]
+            key ^= grid_data.zobrist_boxes[box] ^ grid_data.zobrist_boxes[box_new_position]
+            children.append((NodeValue(player, new_boxes, key, region), direction))
+    return children
+
+# Pushes from the meeting state to the objectives, read off the backward side's parent links
+def backward_pushes(grid_data: GridData, node):
+    pushes = []
+    while node.parent:
+        pushes.append((node.value.player + grid_data.offset(node.direction.value), node.direction))
+        node = node.parent
+    return pushes
+
+# Pushes from the root to the meeting state, read off the forward side's parent links
+def forward_pushes(node):
+    pushes = []
+    while node.parent:
+        pushes.append((node.value.player, node.direction))
+        node = node.parent
+    return pushes[::-1]
+
+# Expand one layer of a side. Returns the next layer and the best (forward, backward) meeting pair found, if any
+def expand_layer(grid_data: GridData, data: TreeData, layer, seen, other, forward):
+    next_layer = []
+    meeting = None
+    for node in layer:
+        data.expanded_node_count += 1
+        if forward:
+            # Layers have to be one push apart for the meeting to be the fewest pushes, so macro moves are left out
+            children = [(value, direction) for value, direction, heuristic, _ in solver.explore_pushes(node, grid_data, macros=False) if heuristic < float('inf')]
+        else:
+            children = explore_pulls(node, grid_data)
+        for value, direction in children:
+            if value in seen:
+                continue
+            child = Node(value, node, direction, node.depth + 1, node.heuristic)
+            seen[value] = child
+            next_layer.append(child)
+            if value in other:
+                pair = (child, other[value]) if forward else (other[value], child)
+                if meeting is None or pair[0].depth + pair[1].depth < meeting[0].depth + meeting[1].depth:
+                    meeting = pair
+    return next_layer, meeting
+
+def bidirectional_search(grid_data: GridData, heuristic_type):
+    start_time = time.process_time()
+    # Both sides search push states, whatever the search mode
+    root = solver.initial_node(grid_data, heuristic_type, 'push')
+    data = TreeData(None, 0, 0, 'bidirectional', heuristic_type)
+    forward_layer = [root]
+    backward_layer = goal_nodes(grid_data)
+    forward_seen = {root.value: root}
+    backward_seen = {node.value: node for node in backward_layer}
+    meeting = (root, backward_seen[root.value]) if root.value in backward_seen else None
+
+    while meeting is None and forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_layer(grid_data, data, forward_layer, forward_seen, backward_seen, True)
+        else:
+            backward_layer, meeting = expand_layer(grid_data, data, backward_layer, backward_seen, forward_seen, False)
+        data.frontier_node_count = len(forward_layer) + len(backward_layer)
+
+    if meeting is None:
+        print(f"Expanded nodes: {data.expanded_node_count}, Frontier nodes: {data.frontier_node_count}")
+        print("No solution found")
+    else:
+        forward, backward = meeting
+        pushes = forward_pushes(forward) + backward_pushes(grid_data, backward)
+        route = [direction.name for direction in solver.expand_pushes(grid_data, root.value.player, root.value.boxes, pushes)]
+        solver.write_solution(grid_data, data, Node(backward.value, forward, None, forward.depth + backward.depth), time.process_time() - start_time, route)
+    data.close()
+    return data
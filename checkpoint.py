@@ -0,0 +1,78 @@
+import glob
+import io
+import os
+import pickle
+from tree import Node
+
+# Checkpoints are a pickle of the search state where every Node is replaced by its index in a flat node table.
+# Search trees are linked through parents and can be far deeper than the recursion limit pickle has,
+# so the table lists each node once, ancestors first, as (value, parent index, direction name, depth, heuristic)
+
+class NodeTablePickler(pickle.Pickler):
+    def __init__(self, file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.indices = {}
+        self.table = []
+
+    def node_index(self, node):
+        chain = []
+        while node is not None and id(node) not in self.indices:
+            chain.append(node)
+            node = node.parent
+        for node in reversed(chain):
+            parent = self.indices[id(node.parent)] if node.parent is not None else -1
+            direction = node.direction.name if node.direction else None
+            self.indices[id(node)] = len(self.table)
+            self.table.append((node.value, parent, direction, node.depth, node.heuristic))
+        return self.indices[id(chain[0])] if chain else None
+
+    def persistent_id(self, obj):
+        if isinstance(obj, Node):
+            index = self.indices.get(id(obj))
+            return index if index is not None else self.node_index(obj)
+        return None
+
+class NodeTableUnpickler(pickle.Unpickler):
+    def __init__(self, file, nodes):
+        super().__init__(file)
+        self.nodes = nodes
+
+    def persistent_load(self, index):
+        return self.nodes[index]
+
+# Write state to path, replacing any previous checkpoint only once the new one is complete
+def save_checkpoint(path, state):
+    buffer = io.BytesIO()
+    pickler = NodeTablePickler(buffer)
+    pickler.dump(state)
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as f:
+        pickle.dump((pickler.table, buffer.getvalue()), f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+# Read back a state written by save_checkpoint. directions is the enum the node directions are named after
+def load_checkpoint(path, directions):
+    with open(path, 'rb') as f:
+        table, state = pickle.load(f)
+    nodes = []
+    for value, parent, direction, depth, heuristic in table:
+        nodes.append(Node(value, nodes[parent] if parent >= 0 else None, directions[direction] if direction else None, depth, heuristic))
+    return NodeTableUnpickler(io.BytesIO(state), nodes).load()
+
+# Most recently written checkpoint in directory, or None if there are none
+def latest_checkpoint(directory):
+    paths = glob.glob(os.path.join(directory, '*.ckpt'))
+    return max(paths, key=os.path.getmtime) if paths else None
+
+# Resume the given checkpoint, or the latest one in the configured directory
+if __name__ == "__main__":
+    import sys
+    import solver
+    path = sys.argv[1] if len(sys.argv) > 1 else latest_checkpoint(solver.checkpoint_config["directory"])
+    if path is None:
+        print("No checkpoint found")
+    else:
+        solver.resume(path)
@@ -0,0 +1,98 @@
+from grid_aux import GridData
+
+# Dynamic deadlock detection, run on the boxes around the one that was just pushed.
+# A box is frozen when it can't move along either axis: a wall on one side, dead squares on both sides
+# or a frozen box on one side. While a box is being checked it is taken as a wall, so clusters of boxes
+# that block each other are found without looping. A frozen box off an objective can never be solved.
+# Only boxes within FREEZE_WINDOW cells of the pushed box are looked at, the rest are taken as free cells,
+# which can only miss deadlocks. Results are cached by the pushed box and the boxes around it
+
+FREEZE_WINDOW = 2
+
+def boxes_around(grid_data: GridData, boxes, box):
+    row, column = divmod(box, grid_data.width)
+    around = []
+    for other in boxes:
+        other_row, other_column = divmod(other, grid_data.width)
+        if abs(other_row - row) <= FREEZE_WINDOW and abs(other_column - column) <= FREEZE_WINDOW:
+            around.append(other)
+    return tuple(around)
+
+def blocked_along(grid_data: GridData, box, boxes, offsets, checking, frozen):
+    before, after = box + offsets[0], box + offsets[1]
+    if grid_data.walls[before] or grid_data.walls[after]:
+        return True
+    if grid_data.dead_squares[before] and grid_data.dead_squares[after]:
+        return True
+    for neighbour in (before, after):
+        if neighbour in checking or (neighbour in boxes and is_frozen(grid_data, neighbour, boxes, checking, frozen)):
+            return True
+    return False
+
+# Appends to frozen every box found frozen while checking box. Boxes found frozen while taking box as a wall
+# are taken out again if box turns out to be free
+def is_frozen(grid_data: GridData, box, boxes, checking, frozen):
+    checking.add(box)
+    found = len(frozen)
+    offsets = grid_data.offsets
+    result = blocked_along(grid_data, box, boxes, offsets[0:2], checking, frozen) and blocked_along(grid_data, box, boxes, offsets[2:4], checking, frozen)
+    checking.discard(box)
+    if result:
+        frozen.append(box)
+    else:
+        del frozen[found:]
+    return result
+
+# Boxes frozen together with the pushed box, empty if it can still move
+def frozen_cluster(grid_data: GridData, boxes, box):
+    frozen = []
+    is_frozen(grid_data, box, set(boxes), set(), frozen)
+    return frozen
+
+# Whether pushing a box onto cell box left a deadlock. player is where the player stands after the push
+def is_deadlock(grid_data: GridData, boxes, box, player):
+    around = boxes_around(grid_data, boxes, box)
+    cache_key = (box, around)
+    cached = grid_data.deadlock_cache.get(cache_key)
+    if cached is None:
+        frozen = frozen_cluster(grid_data, around, box)
+        if any(cell not in grid_data.objectives for cell in frozen):
+            cached = True
+        else:
+            cached = tuple(sorted(set(frozen)))
+        grid_data.deadlock_cache[cache_key] = cached
+    if cached is True:
+        return True
+    return bool(cached) and is_frozen_corral(grid_data, boxes, cached, player)
+
+# A frozen cluster on objectives can still close off an area the player can't get into.
+# If every box around that area is frozen nothing can ever get in, so an empty objective inside it is a deadlock
+def is_frozen_corral(grid_data: GridData, boxes, frozen, player):
+    occupied = set(boxes)
+    reachable = grid_data.reachable_cells(player, occupied)
+    seen = set()
+    for box in frozen:
+        for offset in grid_data.offsets:
+            start = box + offset
+            if start in reachable or start in seen or start in occupied or grid_data.walls[start]:
+                continue
+            area = {start}
+            fence = set()
+            stack = [start]
+            while stack:
+                cell = stack.pop()
+                for step in grid_data.offsets:
+                    neighbour = cell + step
+                    if neighbour in area or grid_data.walls[neighbour]:
+                        continue
+                    if neighbour in occupied:
+                        fence.add(neighbour)
+                    else:
+                        area.add(neighbour)
+                        stack.append(neighbour)
+            seen.update(area)
+            if not any(cell in grid_data.objectives for cell in area):
+                continue
+            if all(fence_box in frozen or frozen_cluster(grid_data, boxes_around(grid_data, boxes, fence_box), fence_box) for fence_box in fence):
+                return True
+    return False
@@ -0,0 +1,118 @@
+from collections import deque
+import heapq
+
+# Frontiers share the same interface: push(node), pop() and len()
+
+class StackFrontier:
+    def __init__(self):
+        self.nodes = []
+
+    def push(self, node):
+        self.nodes.append(node)
+
+    def pop(self):
+        return self.nodes.pop()
+
+    def __len__(self):
+        return len(self.nodes)
+
+class QueueFrontier:
+    def __init__(self):
+        self.nodes = deque()
+
+    def push(self, node):
+        self.nodes.append(node)
+
+    def pop(self):
+        return self.nodes.popleft()
+
+    def __len__(self):
+        return len(self.nodes)
+
+# Binary heap ordered by key(node), ties are popped in insertion order
+class HeapFrontier:
+    def __init__(self, key):
+        self.key = key
+        self.entries = []
+        self.count = 0
+
+    # sort_key replaces the key of the node, for nodes sorted by more than what they hold
+    def push(self, node, sort_key=None):
+        heapq.heappush(self.entries, (self.key(node) if sort_key is None else sort_key, self.count, node))
+        self.count += 1
+
+    def pop(self):
+        return heapq.heappop(self.entries)[2]
+
+    def __len__(self):
+        return len(self.entries)
+
+# Two level bucket queue for keys that are (primary, secondary) pairs of small non negative integers.
+# Push and pop are O(1) amortised, the lowest non empty bucket is found by moving a cursor forward
+# and nodes with the same key are popped in insertion order. Nodes with an infinite key (a start state
+# that can never be solved) have no bucket, they wait in unbounded and go after every other node like in a heap
+class BucketFrontier:
+    def __init__(self, key):
+        self.key = key
+        self.buckets = []
+        self.lowest = []
+        self.unbounded = deque()
+        self.primary = 0
+        self.size = 0
+
+    def push(self, node):
+        primary, secondary = self.key(node)
+        if primary == float('inf'):
+            self.unbounded.append(node)
+            self.size += 1
+            return
+        while len(self.buckets) <= primary:
+            self.buckets.append([])
+            self.lowest.append(0)
+        row = self.buckets[primary]
+        while len(row) <= secondary:
+            row.append(deque())
+        row[secondary].append(node)
+        self.lowest[primary] = min(self.lowest[primary], secondary)
+        self.primary = min(self.primary, primary)
+        self.size += 1
+
+    def pop(self):
+        while True:
+            if self.primary == len(self.buckets):
+                self.size -= 1
+                return self.unbounded.popleft()
+            row = self.buckets[self.primary]
+            secondary = self.lowest[self.primary]
+            while secondary < len(row) and not row[secondary]:
+                secondary += 1
+            self.lowest[self.primary] = secondary
+            if secondary < len(row):
+                self.size -= 1
+                return row[secondary].popleft()
+            self.primary += 1
+
+    def __len__(self):
+        return self.size
+
+# Beam search frontier: nodes are expanded a layer at a time, and once a layer is done only the width best nodes
+# of the next one by key(node) are kept. Ties keep insertion order
+class BeamFrontier:
+    def __init__(self, key, width):
+        self.key = key
+        self.width = width
+        self.layer = deque()
+        self.next_layer = []
+
+    def push(self, node):
+        self.next_layer.append(node)
+
+    def pop(self):
+        if not self.layer:
+            self.next_layer.sort(key=self.key)
+            self.layer = deque(self.next_layer[:self.width])
+            self.next_layer = []
+        return self.layer.popleft()
+
+    def __len__(self):
+        return len(self.layer) + len(self.next_layer)
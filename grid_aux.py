@@ -1,4 +1,7 @@
 import json
+import random
+from collections import deque
+import numpy as np
 from enum import Enum
 from collections import namedtuple
 
@@ -10,6 +13,18 @@ class GridElement(Enum):
     OBJECTIVE = 3
     BOX = 4
 
+# Fixed seed so every process builds the same Zobrist tables for a map
+ZOBRIST_SEED = 1
+
+# Push distance of a cell that can not reach an objective, large enough to never be part of an optimal matching
+UNREACHABLE = 1_000_000
+
+# Flattened offsets are built from these (row, column) steps
+STEPS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+# The eight cells around a cell in clockwise order from the one above, the ones next to it are at even positions
+RING = [(-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1), (-1, -1)]
+
 class Coordinate:
     def __init__(self, row, column):
         self.row = row
@@ -43,21 +58,132 @@ class GridData:
     def __init__(self, grid, player_position, boxes_positions, objectives_positions, grid_name = None):
         self.name = grid_name
         self.grid = grid
-        self.player_position = player_position
-        self.boxes_positions = boxes_positions
         self.objective_positions = objectives_positions
 
+        # Cells are flattened to integer indices over the grid padded with a border of walls,
+        # so a move from any walkable cell never leaves the array
+        self.height = len(grid) + 2
+        self.width = max([len(row) for row in grid]) + 2
+        self.walls = [True for _ in range(self.width * self.height)]
+        for i, row in enumerate(grid):
+            for j, cell in enumerate(row):
+                self.walls[(i + 1) * self.width + j + 1] = cell == GridElement.FILLED
+        self.objectives = frozenset(self.index(objective) for objective in objectives_positions)
+        self.offsets = [self.offset(step) for step in STEPS]
+        # Floor cells next to each cell, for flood fills, and the eight cells around each floor cell
+        self.neighbours = [tuple(cell + offset for offset in self.offsets if not self.walls[cell + offset]) if not wall else () for cell, wall in enumerate(self.walls)]
+        ring_offsets = [self.offset(step) for step in RING]
+        self.rings = [tuple(cell + offset for offset in ring_offsets) if not wall else () for cell, wall in enumerate(self.walls)]
+
+        # Zobrist tables, one random 64 bit value per cell for the player and for a box
+        rng = random.Random(ZOBRIST_SEED)
+        self.zobrist_player = [rng.getrandbits(64) for _ in self.walls]
+        self.zobrist_boxes = [rng.getrandbits(64) for _ in self.walls]
+
+        self.player = self.index(player_position) if player_position else None
+        self.boxes = tuple(sorted(self.index(box) for box in boxes_positions))
+
+    # Flattened index of a coordinate
+    def index(self, coordinate):
+        return (coordinate.row + 1) * self.width + coordinate.column + 1
+
+    # Coordinate of a flattened index
+    def coordinate(self, index):
+        row, column = divmod(index, self.width)
+        return Coordinate(row - 1, column - 1)
+
+    # Index offset of a (row, column) direction
+    def offset(self, direction):
+        return direction[0] * self.width + direction[1]
+
+    # Full Zobrist key of a state, moves update it incrementally from here on
+    def zobrist(self, player, boxes):
+        key = self.zobrist_player[player]
+        for box in boxes:
+            key ^= self.zobrist_boxes[box]
+        return key
+
+    # Cells the player can walk to without pushing any box. occupied is looked up once per cell, so it should be a set.
+    # Cells in known are taken as already reached and not walked through, the result then only has the new ones
+    def reachable_cells(self, player, occupied, known=()):
+        neighbours = self.neighbours
+        seen = {player}
+        stack = [player]
+        while stack:
+            cell = stack.pop()
+            for neighbour in neighbours[cell]:
+                if neighbour not in seen and neighbour not in occupied and neighbour not in known:
+                    seen.add(neighbour)
+                    stack.append(neighbour)
+        return seen
+
+    # Walks breadth first from player like reachable_cells, stopping as soon as every cell in targets is reached.
+    # Returns the cells reached and whether that happened, if not the cells are all the reachable ones
+    def reaches(self, player, occupied, targets):
+        neighbours = self.neighbours
+        missing = len(targets) - (player in targets)
+        seen = {player}
+        # Cells are visited in the order they were found, the list grows while it is walked
+        order = [player]
+        for cell in order:
+            if not missing:
+                break
+            for neighbour in neighbours[cell]:
+                if neighbour not in seen and neighbour not in occupied:
+                    seen.add(neighbour)
+                    order.append(neighbour)
+                    if neighbour in targets:
+                        missing -= 1
+        return seen, not missing
+
+    # Whether the free cells next to cell stay connected through the cells around it when cell gets blocked,
+    # so anything that could be reached through cell still can. Only the eight cells around are looked at,
+    # it can say no for a cell that does not actually cut anything off
+    def keeps_connected(self, cell, occupied):
+        walls = self.walls
+        free = [not walls[around] and around not in occupied for around in self.rings[cell]]
+        if all(free):
+            return True
+        # Runs of free cells around, only the ones with a cell next to cell (even positions) count
+        runs = 0
+        in_run = False
+        touches = False
+        start = free.index(False)
+        for i in range(start + 1, start + 9):
+            position = i % 8
+            if free[position]:
+                in_run = True
+                touches = touches or position % 2 == 0
+            elif in_run:
+                runs += touches
+                in_run = False
+                touches = False
+        return runs <= 1
+
+    @property
+    def player_position(self):
+        return self.coordinate(self.player)
+
+    @property
+    def boxes_positions(self):
+        return [self.coordinate(box) for box in self.boxes]
+
     def copy(self):
-        return GridData(self.grid, self.player_position, self.boxes_positions, self.objective_positions, self.name)
+        aux = GridData(self.grid, None, [], self.objective_positions, self.name)
+        aux.player = self.player
+        aux.boxes = self.boxes
+        return aux
     
-    def original(self, player_position, boxes_positions):
+    def original(self, player, boxes):
+        player_position = self.coordinate(player)
+        boxes_positions = {self.coordinate(box) for box in boxes}
         grid = []
         for i, row in enumerate(self.grid):
             string=""
             for j, cell in enumerate(row):
                 if player_position.row == i and player_position.column == j:
                     string += "@"
-                elif any(i == box.row and j == box.column for box in boxes_positions):
+                elif Coordinate(i, j) in boxes_positions:
                     if self.grid[i][j] == GridElement.OBJECTIVE:
                         string += ":"
                     else:
@@ -79,7 +205,7 @@ def validate_grid(grid_data):
     row_count = len(grid_data.grid)
     if row_count == 0:
         raise ValueError("Grid cannot be empty")    
-    if len(grid_data.objective_positions) != len(grid_data.boxes_positions):
+    if len(grid_data.objective_positions) != len(grid_data.boxes):
         raise ValueError("There must be the same number of objectives as boxes in the grid")
     return True
 
@@ -111,4 +237,131 @@ def load_grid(data):
         grid.append(row)
     data = GridData(grid, player_position, boxes_positions, objectives_positions, data['name'])
     validate_grid(data)
-    return data
\ No newline at end of file
+    data.dead_squares = compute_dead_squares(data)
+    data.push_distances = compute_push_distances(data)
+    data.moves, data.pushes = compute_move_tables(data)
+    data.macro_paths = compute_macro_paths(data)
+    # Deadlock checks by pushed box and the boxes around it, filled as the search goes
+    data.deadlock_cache = {}
+    return data
+
+# Marks every cell from which a box can never be pushed onto an objective.
+# Boxes are pulled backwards from every objective, a pull needs the cell the box moves into
+# and the one behind it (where the player ends) to be free. Cells never reached are dead.
+def compute_dead_squares(grid_data):
+    dead = [True for _ in grid_data.walls]
+    queue = deque(grid_data.objectives)
+    for objective in grid_data.objectives:
+        dead[objective] = False
+    while queue:
+        cell = queue.popleft()
+        for offset in grid_data.offsets:
+            box_cell = cell + offset
+            player_cell = box_cell + offset
+            if not dead[box_cell] or grid_data.walls[box_cell] or grid_data.walls[player_cell]:
+                continue
+            dead[box_cell] = False
+            queue.append(box_cell)
+    return dead
+
+# Minimum number of pushes to take a box from each cell to each objective, ignoring the other boxes.
+# Returns an array of shape (cells, objectives), with objectives sorted by index
+def compute_push_distances(grid_data):
+    distances = []
+    for objective in sorted(grid_data.objectives):
+        distance = [UNREACHABLE for _ in grid_data.walls]
+        distance[objective] = 0
+        queue = deque([objective])
+        while queue:
+            cell = queue.popleft()
+            for offset in grid_data.offsets:
+                box_cell = cell + offset
+                player_cell = box_cell + offset
+                if distance[box_cell] != UNREACHABLE or grid_data.walls[box_cell] or grid_data.walls[player_cell]:
+                    continue
+                distance[box_cell] = distance[cell] + 1
+                queue.append(box_cell)
+        distances.append(distance)
+    return np.array(distances, dtype=np.int64).T
+
+# Moves out of every floor cell, so successors are generated without any arithmetic or bounds checks.
+# moves[cell] has a (step, neighbour, player key, target, box key) per direction whose neighbour is floor:
+# step is the index of the direction in STEPS, the player key is the Zobrist change of walking to neighbour,
+# target is where a box on neighbour would be pushed to (None if that cell is a wall or a dead square)
+# and the box key is the Zobrist change of that push.
+# pushes[box] has a (step, player cell, target, box key) per direction a box on that cell can be pushed in,
+# with the player cell behind the box and the target in front of it both floor and the target not dead
+def compute_move_tables(grid_data):
+    moves = [() for _ in grid_data.walls]
+    pushes = [() for _ in grid_data.walls]
+    for cell, wall in enumerate(grid_data.walls):
+        if wall:
+            continue
+        cell_moves = []
+        cell_pushes = []
+        for step, offset in enumerate(grid_data.offsets):
+            neighbour = cell + offset
+            if grid_data.walls[neighbour]:
+                continue
+            target = neighbour + offset
+            pushable = not grid_data.walls[target] and not grid_data.dead_squares[target]
+            cell_moves.append((step, neighbour, grid_data.zobrist_player[cell] ^ grid_data.zobrist_player[neighbour],
+                               target if pushable else None, grid_data.zobrist_boxes[neighbour] ^ grid_data.zobrist_boxes[target]))
+            behind = cell - offset
+            if not grid_data.walls[behind] and not grid_data.walls[neighbour] and not grid_data.dead_squares[neighbour]:
+                cell_pushes.append((step, behind, neighbour, grid_data.zobrist_boxes[cell] ^ grid_data.zobrist_boxes[neighbour]))
+        moves[cell] = tuple(cell_moves)
+        pushes[cell] = tuple(cell_pushes)
+    return moves, pushes
+
+# Whether cell has walls on both sides across the given direction of STEPS
+def flanked(grid_data, cell, step):
+    first, second = (2, 3) if step < 2 else (0, 1)
+    return grid_data.walls[cell + grid_data.offsets[first]] and grid_data.walls[cell + grid_data.offsets[second]]
+
+# Goal rooms: objectives in a one wide dead end corridor, whose only entrance is its open end.
+# A box pushed in and left short of the deepest free objective walls the ones behind it off for good,
+# so it always goes all the way. Returns the cells a box pushed onto a room cell goes through next, by (cell, step)
+def compute_goal_rooms(grid_data):
+    rooms = {}
+    for objective in grid_data.objectives:
+        for step, offset in enumerate(grid_data.offsets):
+            if not grid_data.walls[objective + offset] or not flanked(grid_data, objective, step):
+                continue
+            # objective is the dead end, the room goes back against offset while it is objectives between walls
+            room = [objective]
+            cell = objective - offset
+            while cell in grid_data.objectives and flanked(grid_data, cell, step):
+                room.append(cell)
+                cell -= offset
+            for i in range(1, len(room)):
+                rooms[(room[i], step)] = tuple(reversed(room[:i]))
+    return rooms
+
+# Macro moves of a map. macro_paths[cell][step] has the cells a box pushed onto cell in that direction is pushed through
+# right after, in order, as a single move. Besides goal rooms, that happens in tunnels: while the box and the player
+# behind it both have walls on either side and the box is not on an objective, the box can't be moved sideways and
+# leaving it there only closes the tunnel, so it is pushed on. Cells past a wall or onto a dead square end the path
+def compute_macro_paths(grid_data):
+    rooms = compute_goal_rooms(grid_data)
+    paths = [() for _ in grid_data.walls]
+    for cell, wall in enumerate(grid_data.walls):
+        if wall:
+            continue
+        cell_paths = []
+        for step, offset in enumerate(grid_data.offsets):
+            path = []
+            box = cell
+            while not grid_data.walls[box - offset]:
+                if (box, step) in rooms:
+                    path.extend(rooms[(box, step)])
+                    break
+                following = box + offset
+                if box in grid_data.objectives or not flanked(grid_data, box, step) or not flanked(grid_data, box - offset, step) \
+                        or grid_data.walls[following] or grid_data.dead_squares[following]:
+                    break
+                path.append(following)
+                box = following
+            cell_paths.append(tuple(path))
+        paths[cell] = tuple(cell_paths)
+    return paths
@@ -0,0 +1,189 @@
+import multiprocessing
+import queue
+import time
+import solver
+from solver import Direction, TreeData
+from grid_aux import GridData
+from tree import Node, NodeValue
+from frontier import HeapFrontier
+
+# Hash distributed A*. Every worker owns the states whose Zobrist key modulo the number of workers is its index,
+# keeps its own open list and best depth per state, and sends the children it does not own to their owners in batches.
+# A worker only expands nodes with f below the best solution found so far by any worker (the incumbent), so once
+# every worker is idle with no batch in flight the incumbent is optimal for an admissible heuristic.
+
+DIRECTIONS = list(Direction)
+
+# Batches carry children as (player, boxes, key, region, depth, heuristic, parent key, direction index)
+def pack_child(value, depth, heuristic, parent_key, direction):
+    return (value.player, value.boxes, value.key, value.region, depth, heuristic, parent_key, direction)
+
+class Worker:
+    def __init__(self, index, grid_data, inboxes, incumbent, sent, received, idle, stop, batch_size):
+        self.index = index
+        self.grid_data = grid_data
+        self.inboxes = inboxes
+        self.incumbent = incumbent
+        self.sent = sent
+        self.received = received
+        self.idle = idle
+        self.stop = stop
+        self.batch_size = batch_size
+        self.frontier = HeapFrontier(solver.sorting_options['a_star'])
+        self.best_depth = {}
+        # key -> (parent key, direction index, player, depth), enough to rebuild the route once the search is over
+        self.came_from = {}
+        self.outboxes = [[] for _ in inboxes]
+        self.goal = None
+        self.expanded_node_count = 0
+
+    def insert(self, player, boxes, key, region, depth, heuristic, parent_key, direction):
+        value = NodeValue(player, boxes, key, region)
+        if self.best_depth.get(value, float('inf')) <= depth:
+            return
+        self.best_depth[value] = depth
+        self.came_from[key] = (parent_key, direction, player, depth)
+        self.frontier.push(Node(value, None, None, depth, heuristic))
+
+    # Not idle from the moment a batch comes in, before it is counted, so the coordinator can't see every batch
+    # received while this worker still has the batch's children to expand and send
+    def receive(self, batch):
+        self.idle[self.index] = 0
+        self.received[self.index] += 1
+        for child in batch:
+            self.insert(*child)
+
+    def send(self, owner):
+        # Counted before it is put, so the coordinator never sees more batches received than sent
+        self.sent[self.index] += 1
+        self.inboxes[owner].put(self.outboxes[owner])
+        self.outboxes[owner] = []
+
+    def flush(self):
+        for owner, outbox in enumerate(self.outboxes):
+            if outbox:
+                self.send(owner)
+
+    def has_work(self):
+        return len(self.frontier) > 0 and self.frontier.entries[0][0][0] < self.incumbent.value
+
+    def expand(self):
+        node = self.frontier.pop()
+        if self.best_depth[node.value] < node.depth:
+            return
+        if solver.is_solution(self.grid_data, node.value.boxes):
+            with self.incumbent.get_lock():
+                if node.depth < self.incumbent.value:
+                    self.incumbent.value = node.depth
+                    self.goal = (node.value.key, node.depth)
+            return
+        self.expanded_node_count += 1
+        if solver.search_mode == 'push':
+            children = solver.explore_pushes(node, self.grid_data)
+        else:
+            children = solver.explore_node(node, self.grid_data)
+        workers = len(self.inboxes)
+        for value, direction, heuristic, cost in children:
+            depth = node.depth + cost
+            if depth + heuristic >= self.incumbent.value:
+                continue
+            child = pack_child(value, depth, heuristic, node.value.key, DIRECTIONS.index(direction))
+            owner = value.key % workers
+            if owner == self.index:
+                self.insert(*child)
+            else:
+                self.outboxes[owner].append(child)
+                if len(self.outboxes[owner]) >= self.batch_size:
+                    self.send(owner)
+
+    def run(self):
+        inbox = self.inboxes[self.index]
+        while not self.stop.is_set():
+            try:
+                while True:
+                    self.receive(inbox.get_nowait())
+            except queue.Empty:
+                pass
+            if self.has_work():
+                self.expand()
+                continue
+            self.flush()
+            self.idle[self.index] = 1
+            try:
+                batch = inbox.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            self.receive(batch)
+
+def run_worker(index, grid_data, inboxes, results, incumbent, sent, received, idle, stop, batch_size, settings):
+    solver.apply_config(settings)
+    # Nothing is left in flight once the coordinator stops the search
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+    worker = Worker(index, grid_data, inboxes, incumbent, sent, received, idle, stop, batch_size)
+    worker.run()
+    results.put((worker.goal, worker.came_from, worker.expanded_node_count, len(worker.frontier)))
+
+# Rebuild the solution as a chain of nodes from the root, so it can go through solver.build_route
+def rebuild_route(grid_data: GridData, root, came_from, goal_key, depth):
+    keys = []
+    key = goal_key
+    while came_from[key][0] is not None:
+        keys.append(key)
+        key = came_from[key][0]
+    node = root
+    for key in reversed(keys):
+        _, direction, player, depth = came_from[key]
+        node = Node(NodeValue(player, (), key), node, DIRECTIONS[direction], depth)
+    return node
+
+def parallel_search(grid_data: GridData, heuristic_type, workers, batch_size):
+    start_time = time.time()
+    root = solver.initial_node(grid_data, heuristic_type)
+    inboxes = [multiprocessing.Queue() for _ in range(workers)]
+    results = multiprocessing.Queue()
+    incumbent = multiprocessing.Value('d', float('inf'))
+    # One extra slot in sent for the coordinator, which hands the root to its owner
+    sent = multiprocessing.Array('q', workers + 1)
+    received = multiprocessing.Array('q', workers)
+    idle = multiprocessing.Array('b', workers)
+    stop = multiprocessing.Event()
+    processes = [multiprocessing.Process(target=run_worker, args=(index, grid_data, inboxes, results, incumbent, sent, received, idle, stop, batch_size, solver.config))
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+
+    sent[workers] = 1
+    inboxes[root.value.key % workers].put([pack_child(root.value, 0, root.heuristic, None, None)])
+
+    # The search is over when every worker is idle and every batch sent was received,
+    # checked twice in a row with the same counts so no batch can slip between the reads
+    previous = None
+    while True:
+        time.sleep(0.02)
+        current = (all(idle[:]), sum(sent[:]), sum(received[:]))
+        if current[0] and current[1] == current[2] and current == previous:
+            break
+        previous = current
+    stop.set()
+
+    came_from = {}
+    goal = None
+    data = TreeData(None, 0, 0, 'hda_star', heuristic_type)
+    for _ in processes:
+        worker_goal, worker_came_from, expanded_node_count, frontier_node_count = results.get()
+        came_from.update(worker_came_from)
+        data.expanded_node_count += expanded_node_count
+        data.frontier_node_count += frontier_node_count
+        if worker_goal and (goal is None or worker_goal[1] < goal[1]):
+            goal = worker_goal
+    for process in processes:
+        process.join()
+
+    if goal is None:
+        print(f"Expanded nodes: {data.expanded_node_count}, Frontier nodes: {data.frontier_node_count}")
+        print("No solution found")
+    else:
+        solver.write_solution(grid_data, data, rebuild_route(grid_data, root, came_from, *goal), time.time() - start_time)
+    data.close()
+    return data
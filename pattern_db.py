@@ -0,0 +1,95 @@
+import hashlib
+import json
+import os
+from collections import deque
+import numpy as np
+from grid_aux import GridData, UNREACHABLE, load_grid
+
+# Pattern database of box pairs. For every two cells it holds the fewest pushes that take two boxes from them onto
+# any two objectives, with no other boxes on the map and the player free to walk anywhere, so it never overestimates.
+# Pushes on different boxes add up, so splitting the boxes into pairs and adding their costs is still a lower bound.
+# Tables depend only on the walls and objectives, they are stored as <directory>/pairs_<fingerprint>.npy
+# and memory mapped, so the first search on a map builds it and the rest just open the file
+
+# Maps with up to this many boxes try every way to pair them and keep the best, bigger ones pair them in order
+MAX_PAIRINGS_BOXES = 8
+
+def map_fingerprint(grid_data: GridData):
+    layout = json.dumps([grid_data.width, grid_data.walls, sorted(grid_data.objectives)])
+    return hashlib.sha1(layout.encode()).hexdigest()
+
+# Backward breadth first search from every pair of objectives, pulling one box at a time
+def build_pair_database(grid_data: GridData):
+    walls = grid_data.walls
+    table = np.full((len(walls), len(walls)), UNREACHABLE, dtype=np.int32)
+    objectives = sorted(grid_data.objectives)
+    queue = deque()
+    for i, first in enumerate(objectives):
+        for second in objectives[i + 1:]:
+            table[first, second] = table[second, first] = 0
+            queue.append((first, second))
+    while queue:
+        first, second = queue.popleft()
+        cost = table[first, second] + 1
+        for moving, other in ((first, second), (second, first)):
+            for offset in grid_data.offsets:
+                box_cell = moving - offset
+                player_cell = box_cell - offset
+                if walls[box_cell] or walls[player_cell] or box_cell == other or player_cell == other:
+                    continue
+                if table[box_cell, other] != UNREACHABLE:
+                    continue
+                table[box_cell, other] = table[other, box_cell] = cost
+                queue.append((box_cell, other))
+    return table
+
+# Open the map's table, building and saving it first if there is none
+def load_pattern_database(grid_data: GridData, directory):
+    path = os.path.join(directory, f"pairs_{map_fingerprint(grid_data)}.npy")
+    if not os.path.exists(path):
+        os.makedirs(directory, exist_ok=True)
+        # Several workers may build the same map at once, the file only shows up complete
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, 'wb') as f:
+            np.save(f, build_pair_database(grid_data))
+        os.replace(temporary, path)
+    return np.load(path, mmap_mode='r')
+
+# Every way to split boxes into pairs, a box is left on its own when there is an odd number of them
+def pairings(boxes):
+    if len(boxes) < 2:
+        yield [], list(boxes)
+        return
+    if len(boxes) % 2:
+        for i in range(len(boxes)):
+            for pairs, _ in pairings(boxes[:i] + boxes[i + 1:]):
+                yield pairs, [boxes[i]]
+        return
+    first = boxes[0]
+    for i in range(1, len(boxes)):
+        for pairs, single in pairings(boxes[1:i] + boxes[i + 1:]):
+            yield [(first, boxes[i])] + pairs, single
+
+# Pushes for one split of the boxes, single boxes cost their push distance to the closest objective
+def pairing_cost(grid_data: GridData, pairs, single):
+    cost = sum(int(grid_data.pattern_database[first, second]) for first, second in pairs)
+    return cost + sum(int(grid_data.push_distances[box].min()) for box in single)
+
+def pattern_database_heuristic(grid_data: GridData, boxes):
+    if len(boxes) <= MAX_PAIRINGS_BOXES:
+        cost = max(pairing_cost(grid_data, pairs, single) for pairs, single in pairings(list(boxes)))
+    else:
+        pairs = list(zip(boxes[0::2], boxes[1::2]))
+        cost = pairing_cost(grid_data, pairs, list(boxes[len(pairs) * 2:]))
+    return cost if cost < UNREACHABLE else float('inf')
+
+# Build the tables for every active map in grid.json ahead of the searches
+if __name__ == "__main__":
+    with open('config.json') as f:
+        directory = json.load(f).get('pattern_database', {}).get('directory', './pattern_db')
+    with open('grid.json') as f:
+        grids = json.load(f)['active']
+    for grid in grids:
+        grid_data = load_grid(grid)
+        load_pattern_database(grid_data, directory)
+        print(f"{grid_data.name}: {map_fingerprint(grid_data)}")
@@ -0,0 +1,51 @@
+import time
+from collections import Counter
+
+# Opt in profile of a search, kept in TreeData.profile (None when disabled, so the search loop only pays for the checks).
+# Phases of a step:
+#   pop: taking the next node out of the frontier
+#   solution_check: checking if it solves the map
+#   expand: generating its children, which includes the heuristic and deadlock phases
+#   heuristic: computing the children's heuristics
+#   deadlock: dynamic deadlock checks on the children
+#   visited: looking the children up in the visited set
+#   push: building the accepted children's nodes and adding them to the frontier and the visited set
+#   prune: ida_star restarts and ma_star frontier pruning
+PHASES = ['pop', 'solution_check', 'expand', 'heuristic', 'deadlock', 'visited', 'push', 'prune']
+
+class Profile:
+    def __init__(self, sample_interval):
+        self.times = {phase: 0.0 for phase in PHASES}
+        self.calls = {phase: 0 for phase in PHASES}
+        # Children generated and accepted per expanded node, heuristic of every generated child
+        self.branching = Counter()
+        self.accepted = Counter()
+        self.heuristics = Counter()
+        # (expanded nodes, frontier nodes) every sample_interval expansions
+        self.sample_interval = sample_interval
+        self.frontier_sizes = []
+
+    # Adds the time since start to phase and returns the current time, so phases can be chained
+    def add(self, phase, start):
+        now = time.perf_counter()
+        self.times[phase] += now - start
+        self.calls[phase] += 1
+        return now
+
+    def record_expansion(self, expanded_node_count, frontier_node_count, children, accepted_count):
+        self.branching[len(children)] += 1
+        self.accepted[accepted_count] += 1
+        for _, _, heuristic, _ in children:
+            self.heuristics[heuristic] += 1
+        if expanded_node_count % self.sample_interval == 0:
+            self.frontier_sizes.append((expanded_node_count, frontier_node_count))
+
+    def to_json(self):
+        return {
+            "phases": {phase: {"time": self.times[phase], "calls": self.calls[phase]} for phase in PHASES},
+            "branching": dict(self.branching),
+            "accepted": dict(self.accepted),
+            # Infinite heuristics (deadlocks) can't be written as JSON numbers
+            "heuristics": {str(heuristic): count for heuristic, count in self.heuristics.items()},
+            "frontier_sizes": self.frontier_sizes
+        }
@@ -0,0 +1,184 @@
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import time
+from collections import deque
+import solver
+from solver import Direction, TreeData
+from grid_aux import GridData
+from tree import Node, NodeValue
+
+# Portfolio race. Every member of the portfolio (an algorithm and a heuristic) searches the same map in a process
+# of its own. At most workers members run at once, the rest wait in order and start as running ones finish.
+# Without a deadline the first valid solution wins; with one, the cheapest solution found before it wins
+# (the first one found after it if there was none). The members still running are then asked to stop, the ones
+# that don't within the grace time are terminated, and the ones still waiting never start. Wins are counted
+# per map in the stats file for the members that ran, and the members that won the most on a map, then overall,
+# start first next time, which matters when there are more members than workers
+
+# Members check the stop event every this many steps, a lookup on every step would slow them down
+STOP_CHECK_INTERVAL = 64
+
+# Members run the search one step at a time instead of in processes of their own
+race_algorithms = ['bfs', 'dfs', 'a_star', 'greedy', 'ida_star', 'ma_star', 'weighted_a_star', 'ara_star', 'beam']
+
+def member_label(member):
+    return f"{member['algorithm']}_{member['heuristic']}"
+
+def load_stats(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_stats(path, stats):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(stats, f, indent=4)
+    os.replace(temporary, path)
+
+# Portfolio sorted by wins on the map, then by wins on every map. Members that never won keep the configured order
+def portfolio_order(portfolio, stats, name):
+    total_wins = {}
+    for records in stats.values():
+        for label, record in records.items():
+            total_wins[label] = total_wins.get(label, 0) + record['wins']
+    map_stats = stats.get(name, {})
+    return sorted(portfolio, key=lambda member: (-map_stats.get(member_label(member), {}).get('wins', 0),
+                                                 -total_wins.get(member_label(member), 0)))
+
+def record_race(stats, name, members, winner):
+    map_stats = stats.setdefault(name, {})
+    for member in members:
+        record = map_stats.setdefault(member_label(member), {'races': 0, 'wins': 0})
+        record['races'] += 1
+        if member is winner:
+            record['wins'] += 1
+
+# Runs in its own process with the settings of the main process. Puts ('solution', index, route, depth, expanded nodes,
+# frontier nodes, bound) in results for every solution found (ara_star can find several) and ('done', index) when the
+# search is over or was stopped
+def run_member(index, grid_data: GridData, algorithm, heuristic, results, stop, settings):
+    solver.apply_config(settings)
+    # Members race on the search itself, an answer from the solution cache would always win
+    solver.cache_config = {"enabled": False}
+    data = solver.initialize_tree(grid_data, algorithm, heuristic)
+    try:
+        steps = 0
+        while not (steps % STOP_CHECK_INTERVAL == 0 and stop.is_set()):
+            steps += 1
+            node, solved = solver.algorithm_step(grid_data, data)
+            if solved:
+                bound = solver.solution_bound(data, node)
+                results.put(('solution', index, solver.build_route(grid_data, node), node.depth, data.expanded_node_count, data.frontier_node_count, bound))
+                if not solver.search_goes_on(data, node, bound):
+                    break
+            elif data.frontier_node_count == 0 and not solver.search_goes_on(data):
+                break
+    finally:
+        data.close()
+        results.put(('done', index))
+
+# Whether route solves the map, so a member with a bug can't win the race
+def valid_route(grid_data: GridData, route):
+    player, boxes = grid_data.player, grid_data.boxes
+    for step in route:
+        result = solver.move_player(Direction[step], grid_data, player, boxes)
+        if not result.moved:
+            return False
+        player, boxes = result.player, result.boxes
+    return solver.is_solution(grid_data, boxes)
+
+# Ask every member to stop and wait for them, reading what they still send so none blocks on a full queue
+def cancel(processes, results, stop, grace):
+    stop.set()
+    end = time.perf_counter() + grace
+    while any(process.is_alive() for process in processes) and time.perf_counter() < end:
+        try:
+            while True:
+                results.get_nowait()
+        except queue.Empty:
+            pass
+        for process in processes:
+            process.join(0.01)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+def race_search(grid_data: GridData):
+    settings = solver.race_config
+    for member in settings['portfolio']:
+        if member['algorithm'] not in race_algorithms:
+            raise ValueError(f"Invalid race algorithm. Allowed options are {race_algorithms}.")
+    stats = load_stats(settings['stats'])
+    members = portfolio_order(settings['portfolio'], stats, grid_data.name)
+    workers = settings['workers'] or os.cpu_count()
+    start_time = time.perf_counter()
+    deadline = start_time + settings['deadline'] if settings['deadline'] else None
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    waiting = deque(range(len(members)))
+    processes = {}
+
+    # best is (depth, arrival order, index, route, expanded nodes, frontier nodes, bound, elapsed time)
+    best = None
+    arrivals = 0
+    running = set()
+    while True:
+        if best and (deadline is None or time.perf_counter() >= deadline):
+            break
+        while waiting and len(running) < workers:
+            index = waiting.popleft()
+            processes[index] = multiprocessing.Process(target=run_member, args=(index, grid_data, members[index]['algorithm'], members[index]['heuristic'], results, stop, solver.config))
+            processes[index].start()
+            running.add(index)
+        if not running:
+            break
+        try:
+            message = results.get(timeout=0.05)
+        except queue.Empty:
+            # A member that crashed never says it is done
+            running -= {index for index in running if not processes[index].is_alive() and processes[index].exitcode != 0}
+            continue
+        if message[0] == 'done':
+            running.discard(message[1])
+            continue
+        _, index, route, depth, expanded_node_count, frontier_node_count, bound = message
+        if not valid_route(grid_data, route):
+            message = f"Discarded an invalid solution from {member_label(members[index])}"
+            print(message)
+            logging.info(message)
+            continue
+        arrivals += 1
+        solution = (depth, arrivals, index, route, expanded_node_count, frontier_node_count, bound, time.perf_counter() - start_time)
+        if best is None or solution < best:
+            best = solution
+    cancel(list(processes.values()), results, stop, settings['grace'])
+
+    if best is None:
+        data = TreeData(None, 0, 0, 'race', None)
+        message = f"Grid: {grid_data.name}\nNo member of the race found a solution"
+        print(message)
+        logging.info(message)
+        data.close()
+        return data
+    depth, _, index, route, expanded_node_count, frontier_node_count, bound, elapsed_time = best
+    winner = members[index]
+    # Only the members that got to run took part in the race
+    members = [member for index, member in enumerate(members) if index in processes]
+    record_race(stats, grid_data.name, members, winner)
+    save_stats(settings['stats'], stats)
+    rivals = [member_label(member) for member in members if member is not winner]
+    message = f"Race on {grid_data.name} won by {member_label(winner)} " + (f"against {', '.join(rivals)}" if rivals else "before any other member ran")
+    print(message)
+    logging.info(message)
+    data = TreeData(None, expanded_node_count, frontier_node_count, 'race', winner['heuristic'])
+    root = Node(NodeValue(grid_data.player, grid_data.boxes, None, None))
+    solver.write_solution(grid_data, data, Node(root.value, root, None, depth), elapsed_time, route,
+                        extra={"winner": winner['algorithm'], "bound": bound, "members": [member_label(member) for member in members]})
+    data.close()
+    return data
@@ -0,0 +1,178 @@
+import arcade
+import glob
+import json
+import math
+import solver
+from solver import Direction, move_player
+from grid_aux import load_grid, GridElement, Coordinate
+
+# Viewer of the replay files written by the searches, only imported when replay is enabled
+
+# This sets the WIDTH and HEIGHT of each grid location
+WIDTH = 30
+HEIGHT = 30
+
+# This sets the margin between each cell
+# and on the edges of the screen.
+MARGIN = 5
+
+HORIZONTAL_GRIDS_COUNT = 3
+
+MAX_HEIGHT = 1000
+MAX_WIDTH = 1600
+
+# Do the math to figure out our screen dimensions
+SCREEN_TITLE = "Sokoban"
+
+class Sokoban(arcade.Window):
+    def __init__(self, title, grid_datas: list, routes=[], grid_algorithms: list = [], close_on_finish=False):
+        global WIDTH, HEIGHT, MARGIN
+
+        self.time_since_last_move = 0
+
+        width = 0
+        height = 0
+        self.paused = False
+        self.close_on_finish = close_on_finish
+
+        if grid_datas and len(grid_datas) == 0:
+            raise ValueError("No grids to show")
+        for grid_data in grid_datas:
+            if len(grid_data.grid) == 0:
+                raise ValueError("Initial grid cannot be empty")
+        self.grids = grid_datas
+
+        self.routes = routes
+        self.max_grid_width = max([len(grid.grid[0]) for grid in grid_datas])
+        self.max_grid_height = max([len(grid.grid) for grid in grid_datas])
+        self.grid_algorithms = grid_algorithms
+        for grid_data in grid_datas:
+            self.grid_row_count = math.ceil(len(grid_datas)/HORIZONTAL_GRIDS_COUNT)
+
+        self.steps = [0 for _ in grid_datas]
+
+        horizontal_grids = min(HORIZONTAL_GRIDS_COUNT, len(grid_datas))
+        width = (WIDTH + MARGIN) * self.max_grid_width * horizontal_grids + MARGIN + WIDTH * (horizontal_grids - 1) + 5*WIDTH
+        height = (WIDTH + MARGIN) * self.max_grid_height * self.grid_row_count + MARGIN + HEIGHT * (self.grid_row_count)
+
+        while width > MAX_WIDTH or height > MAX_HEIGHT:
+            relation = min(MAX_WIDTH / width, MAX_HEIGHT / height)
+            WIDTH = int(WIDTH * relation)
+            HEIGHT = int(HEIGHT * relation)
+            MARGIN = int(MARGIN * relation)
+            width = (WIDTH + MARGIN) * self.max_grid_width * horizontal_grids + MARGIN + WIDTH * (horizontal_grids - 1) + 5*WIDTH
+            height = (WIDTH + MARGIN) * self.max_grid_height * self.grid_row_count + MARGIN + HEIGHT * (self.grid_row_count)
+        
+        super().__init__(width, height, title)
+
+        self.step = 0
+
+        arcade.set_background_color(arcade.color.BLACK)
+
+    def on_draw(self):
+        # This command has to happen before we start drawing
+        self.clear()
+
+        # Draw the grid
+        for i, grid in enumerate(self.grids):   
+
+            if (i % HORIZONTAL_GRIDS_COUNT) == 0:
+                grid_height = (MARGIN + HEIGHT) * self.max_grid_height
+                text_y = self.height - (MARGIN + HEIGHT) * (self.max_grid_height+1) * ((i // HORIZONTAL_GRIDS_COUNT)+1) + grid_height / 2
+                text_x = WIDTH
+                arcade.draw_text(self.grid_algorithms[i], text_x, text_y, arcade.color.YELLOW, 14)
+
+            for row in range(len(grid.grid)):                    
+                for column in range(len(grid.grid[0])):
+                    cell = grid.index(Coordinate(row, column))
+                    # Figure out what color to draw the box
+                    if grid.player == cell:
+                        color = arcade.color.RED
+                        shape = arcade.draw_circle_filled
+                    elif cell in grid.boxes:
+                        color = arcade.color.BLUE
+                        shape = arcade.draw_rectangle_filled
+                    elif grid.grid[row][column] == GridElement.OBJECTIVE:
+                        color = arcade.color.GREEN
+                        shape = arcade.draw_rectangle_filled
+                    elif grid.grid[row][column] == GridElement.FILLED:
+                        color = arcade.color.WHITE
+                        shape = arcade.draw_rectangle_filled
+                    else:
+                        color = arcade.color.BLACK
+                        shape = arcade.draw_rectangle_filled
+
+                    grid_x_offset = (MARGIN + WIDTH) * self.max_grid_width * (i % HORIZONTAL_GRIDS_COUNT) + WIDTH * (i % HORIZONTAL_GRIDS_COUNT)
+                    grid_y_offset = (MARGIN + HEIGHT) * self.max_grid_height * (i // HORIZONTAL_GRIDS_COUNT) + HEIGHT * (i // HORIZONTAL_GRIDS_COUNT)
+
+                    # Do the math to figure out where the box is
+                    x = (MARGIN + WIDTH) * column + MARGIN + WIDTH // 2 + grid_x_offset + 5*WIDTH
+                    y = self.height - ((MARGIN + HEIGHT) * row + MARGIN + HEIGHT // 2 + grid_y_offset)
+                    height_diff = self.max_grid_height - len(grid.grid)
+                    y -= height_diff * (WIDTH + MARGIN) / 2
+                    width_diff = self.max_grid_width - len(grid.grid[0])
+                    x += width_diff * (WIDTH + MARGIN) / 2
+
+                    if shape == arcade.draw_circle_filled:
+                        shape(x, y, WIDTH // 2, color)  
+                    else:
+                        shape(x, y, WIDTH, HEIGHT, color)
+
+    def update(self, delta_time):
+        if self.paused:
+            return
+        
+        # Llamar al algoritmo aca
+        self.time_since_last_move += delta_time
+    
+        move_delta = solver.config["replay"]["speed"] if solver.config["replay"]["enabled"] else 0.01
+
+        if self.time_since_last_move >= move_delta:
+
+            finished_count = 0
+            for i, grid_data in enumerate(self.grids):
+                if self.steps[i] < len(self.routes[i]):
+                    result = move_player(Direction[self.routes[i][self.steps[i]]], grid_data, grid_data.player, grid_data.boxes)
+                    grid_data.player = result.player
+                    grid_data.boxes = result.boxes
+                    self.steps[i] += 1
+                else:
+                    finished_count += 1
+            if finished_count == len(self.grids):
+                self.paused = True
+                if self.close_on_finish:
+                    arcade.close_window()
+                return
+
+            self.time_since_last_move = 0
+
+        return super().update(delta_time)
+
+# Show the replay files matched by the replay paths, one after the other or all at once in a grid
+def watch_replays():
+    grid_datas = []
+    routes = []
+    grid_algorithms = []
+    filenames = []
+    for path in solver.config["replay"]["paths"]:
+        filenames.extend(glob.glob(path))
+    for filename in filenames:
+        with open(filename) as f:
+            grid = json.load(f)
+            grid_datas.append(load_grid(grid))
+            routes.append(grid["route"])
+            grid_algorithms.append(grid["algorithm"])
+    
+    combined = list(zip(grid_algorithms, grid_datas, routes))
+    combined.sort()
+    grid_algorithms, grid_datas, routes = zip(*combined)
+
+    if solver.config["replay"]["sequential"]:
+        for i, grid in enumerate(grid_datas):
+            screen_title = f"Sokoban - {grid_algorithms[i]}"
+            Sokoban(screen_title, [grid], [routes[i]], [grid_algorithms[i]], i != len(grid_datas) - 1)
+            arcade.run()
+    else:
+        screen_title = f"Sokoban"
+        Sokoban(screen_title, grid_datas, routes, grid_algorithms)
+        arcade.run()
@@ -1,18 +1,82 @@
 import json
 import glob
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib
 import os
 
-def main():
-    matplotlib.use('TkAgg')
-    results = []
-    for filename in glob.glob('results/*.json'):
+RESULTS_STORE = 'results/results.feather'
+# Columns kept in the store, the grid and route of a replay are only needed to watch it.
+# mtime and size are the replay file's when it was read, a file rewritten under the same name is read again
+RESULT_COLUMNS = ['file', 'mtime', 'size', 'name', 'algorithm', 'heuristic', 'search_mode', 'cost', 'expanded_nodes', 'frontier_nodes', 'time']
+METRICS = ['time', 'cost', 'expanded_nodes', 'frontier_nodes']
+# Weight of each term of the quality: k for cost, p for time and m for memory (frontier nodes)
+QUALITY_TERMS = {'k': 'cost_relative', 'p': 'time_relative', 'm': 'frontier_nodes_relative'}
+
+# Every result in results/ as one DataFrame, kept in a single Feather file.
+# Only replay files that are not in it yet or changed since they were read are read, and files that were deleted are dropped from it
+def load_results():
+    stamps = {}
+    for filename in glob.glob('results/replay_*.json'):
+        status = os.stat(filename)
+        stamps[filename] = (status.st_mtime_ns, status.st_size)
+    stored = pd.read_feather(RESULTS_STORE) if os.path.exists(RESULTS_STORE) else pd.DataFrame(columns=RESULT_COLUMNS)
+    stored_count = len(stored)
+    # A store written before files were stamped is read again from scratch
+    if 'mtime' not in stored:
+        stored = pd.DataFrame(columns=RESULT_COLUMNS)
+    current = [stamps.get(filename) == (mtime, size) for filename, mtime, size in zip(stored['file'], stored['mtime'], stored['size'])]
+    stored = stored.loc[current]
+    known = set(stored['file'])
+    new = []
+    for filename, (mtime, size) in stamps.items():
+        if filename in known:
+            continue
         with open(filename, 'r') as f:
-            results.append(json.load(f))
+            result = json.load(f)
+        new.append({column: result.get(column) for column in RESULT_COLUMNS} | {'file': filename, 'mtime': mtime, 'size': size})
+    changed = bool(new) or len(stored) != stored_count
+    if new:
+        new = pd.DataFrame(new, columns=RESULT_COLUMNS)
+        stored = pd.concat([stored, new], ignore_index=True) if len(stored) else new
+    if changed:
+        temporary = f"{RESULTS_STORE}.tmp"
+        stored.reset_index(drop=True).to_feather(temporary)
+        os.replace(temporary, RESULTS_STORE)
+    return stored.reset_index(drop=True)
+
+# Metrics relative to BFS on the same map, averaged by algorithm and map
+def add_relative_metrics(df):
+    base = df[df['algorithm'] == 'BFS'].groupby('name')[METRICS].mean().add_prefix('base_')
+    df = df.merge(base, left_on='name', right_index=True, how='left')
+    means = df.groupby(['algorithm', 'name'])[METRICS].transform('mean')
+    for metric in METRICS:
+        df[f'{metric}_relative'] = means[metric] / df[f'base_{metric}']
+    return df
+
+# Mean quality of each algorithm for every value of one weight, with the other two at 1.
+# The quality is linear in the weights, so its mean is the other terms' means plus the swept term's mean times the weight,
+# computed for every algorithm and value at once as an outer product
+def quality_sweep(df, weight, values):
+    terms = 1 - df.set_index('algorithm')[list(QUALITY_TERMS.values())].dropna()
+    means = terms.groupby(level=0).mean()
+    swept = QUALITY_TERMS[weight]
+    fixed = means.drop(columns=swept).sum(axis=1).to_numpy()
+    return pd.DataFrame(fixed[:, None] + np.outer(means[swept].to_numpy(), values), index=means.index, columns=values)
+
+def plot_quality(quality, xlabel, title):
+    plt.figure()
+    for algorithm, values in quality.iterrows():
+        plt.plot(quality.columns, values, '-', label=algorithm)
+    plt.xlabel(xlabel)
+    plt.ylabel('Calidad')
+    plt.legend()
+    plt.title(title)
 
-    df = pd.DataFrame(results)
+def main():
+    matplotlib.use('TkAgg')
+    df = load_results()
     # Replace values in the 'algorithm' column
     df['algorithm'] = df['algorithm'].replace({'a_star': 'A*', 'dfs': 'DFS', 'bfs': 'BFS', 'greedy': 'Greedy'})
 
@@ -20,19 +84,7 @@ def main():
     algorithms.sort()
     os.makedirs("images", exist_ok=True)
 
-    for name in df['name'].unique():
-        df.loc[df['name'] == name, 'base_time'] = df[(df['algorithm'] == 'BFS') & (df['name'] == name)]['time'].mean()
-        df.loc[df['name'] == name, 'base_cost'] = df[(df['algorithm'] == 'BFS') & (df['name'] == name)]['cost'].mean()
-        df.loc[df['name'] == name, 'base_expanded_nodes'] = df[(df['algorithm'] == 'BFS') & (df['name'] == name)]['expanded_nodes'].mean()
-        df.loc[df['name'] == name, 'base_frontier_nodes'] = df[(df['algorithm'] == 'BFS') & (df['name'] == name)]['frontier_nodes'].mean()
-
-    for algorithm in algorithms:
-        for name in df['name'].unique():
-            df.loc[(df['algorithm'] == algorithm) & (df['name'] == name), 'time_relative'] = df[(df['algorithm'] == algorithm) & (df['name'] == name)]['time'].mean() / df[df['name'] == name]['base_time']
-            df.loc[(df['algorithm'] == algorithm) & (df['name'] == name), 'cost_relative'] = df[(df['algorithm'] == algorithm) & (df['name'] == name)]['cost'].mean() / df[df['name'] == name]['base_cost']
-            df.loc[(df['algorithm'] == algorithm) & (df['name'] == name), 'expanded_nodes_relative'] = df[(df['algorithm'] == algorithm) & (df['name'] == name)]['expanded_nodes'].mean() / df[df['name'] == name]['base_expanded_nodes']
-            df.loc[(df['algorithm'] == algorithm) & (df['name'] == name), 'frontier_nodes_relative'] = df[(df['algorithm'] == algorithm) & (df['name'] == name)]['frontier_nodes'].mean() / df[df['name'] == name]['base_frontier_nodes']
-
+    df = add_relative_metrics(df)
 
     grouped = df.groupby(['algorithm'])
 
@@ -55,11 +107,8 @@ def main():
 
     # plt.figure()
     fig, ax = plt.subplots()
-    for algorithm in algorithms:
-        plt.errorbar(filtered[filtered['algorithm'] == algorithm]['cost'].mean(), 
-             filtered[filtered['algorithm'] == algorithm]['time'].mean(), 
-             yerr=filtered[filtered['algorithm'] == algorithm]['time'].std(), 
-             fmt='o', label=algorithm, capsize=6)    
+    for algorithm, group in filtered.groupby('algorithm'):
+        plt.errorbar(group['cost'].mean(), group['time'].mean(), yerr=group['time'].std(), fmt='o', label=algorithm, capsize=6)
         
     plt.legend()
     ax.grid(which = "both")
@@ -73,10 +122,8 @@ def main():
     grouped = filtered.groupby(['algorithm'])
 
     fig, ax = plt.subplots()
-    for algorithm in algorithms:
-        plt.errorbar(filtered[filtered['algorithm'] == algorithm]['cost_relative'].mean(), 
-             filtered[filtered['algorithm'] == algorithm]['time_relative'].mean(), 
-             fmt='o', label=algorithm, capsize=6)    
+    for algorithm, group in filtered.groupby('algorithm'):
+        plt.errorbar(group['cost_relative'].mean(), group['time_relative'].mean(), fmt='o', label=algorithm, capsize=6)
     plt.legend()
     ax.grid(which = "both")
     ax.minorticks_on() 
@@ -100,72 +147,15 @@ def main():
     plt.title('Promedio de nodos expandidos relativos al resolver el problema en todos los mapas')
     plt.savefig('images/expanded_nodes_average.png')
 
-    
-    k = 1
-    m = 1
-    p_values = [_ for _ in range(1, 100)]
 
-    plt.figure()
-    quality_values = {}
-    for algorithm in algorithms:
-        for p_val in p_values:
-            filtered.loc[(filtered['algorithm'] == algorithm), 'quality'] = (k*(1-filtered['cost_relative']) + p_val*(1-filtered['time_relative']) + m*(1-filtered['frontier_nodes_relative']))
-            if algorithm not in quality_values:
-                quality_values[algorithm] = []
-            quality_values[algorithm].append(filtered[filtered['algorithm'] == algorithm]['quality'].mean())
-
-    for algorithm, values in quality_values.items():
-        plt.plot(p_values, values, '-', label=algorithm)
-
-    plt.xlabel('Importancia del tiempo')
-    plt.ylabel('Calidad')
-    plt.legend()
-    plt.title('Calidad de los algoritmos al aumentar la importancia del tiempo')
+    plot_quality(quality_sweep(filtered, 'p', np.arange(1, 100)), 'Importancia del tiempo', 'Calidad de los algoritmos al aumentar la importancia del tiempo')
     plt.savefig('images/quality_time.png')
 
-    p = 1
-    m = 1
-    k_values = [_ for _ in range(1,10)]
-
-    plt.figure()
-    quality_values = {}
-    for algorithm in algorithms:
-        for k_val in k_values:
-            filtered.loc[(filtered['algorithm'] == algorithm), 'quality'] = (k_val*(1-filtered['cost_relative']) + p*(1-filtered['time_relative']) + m*(1-filtered['frontier_nodes_relative']))
-            if algorithm not in quality_values:
-                quality_values[algorithm] = []
-            quality_values[algorithm].append(filtered[filtered['algorithm'] == algorithm]['quality'].mean())
-
-    for algorithm, values in quality_values.items():
-        plt.plot(k_values, values, '-', label=algorithm)
-
-    plt.xlabel('Importancia del costo')
-    plt.ylabel('Calidad')
+    plot_quality(quality_sweep(filtered, 'k', np.arange(1, 10)), 'Importancia del costo', 'Calidad de los algoritmos al aumentar la importancia del costo')
     plt.ylim(-50, 1)
-    plt.legend()
-    plt.title('Calidad de los algoritmos al aumentar la importancia del costo')
     plt.savefig('images/quality_cost.png')
 
-    p = 1
-    k = 1
-    m_values = [_ for _ in range(1,10)]
-
-    plt.figure()
-    quality_values = {}
-    for algorithm in algorithms:
-        for m_val in m_values:
-            filtered.loc[(filtered['algorithm'] == algorithm), 'quality'] = (k*(1-filtered['cost_relative']) + p*(1-filtered['time_relative']) + m_val*(1-filtered['frontier_nodes_relative']))
-            if algorithm not in quality_values:
-                quality_values[algorithm] = []
-            quality_values[algorithm].append(filtered[filtered['algorithm'] == algorithm]['quality'].mean())
-        
-    for algorithm, values in quality_values.items():
-        plt.plot(m_values, values, '-', label=algorithm)
-
-    plt.xlabel('Importancia de la memoria necesaria')
-    plt.ylabel('Calidad')
-    plt.legend()
-    plt.title('Calidad de los algoritmos al aumentar la importancia de la memoria necesaria')
+    plot_quality(quality_sweep(filtered, 'm', np.arange(1, 10)), 'Importancia de la memoria necesaria', 'Calidad de los algoritmos al aumentar la importancia de la memoria necesaria')
     plt.savefig('images/quality_memory.png')
 
     # Now only greedy algorithm
@@ -179,14 +169,13 @@ def main():
     labels = {
         1: "Mas cercano",
         2: "Asignados",
-        3: "Mas lejano"
+        3: "Mas lejano",
+        4: "Emparejamiento optimo",
+        5: "Base de patrones"
     }
-    for heuristic in filtered['heuristic'].unique():
-        plt.errorbar(filtered[filtered['heuristic'] == heuristic]['cost'].mean(), 
-             filtered[filtered['heuristic'] == heuristic]['time'].mean(), 
-             yerr=filtered[filtered['heuristic'] == heuristic]['time'].std(), 
-             fmt='o', label=labels[heuristic], capsize=6)    
-        
+    for heuristic, group in filtered.groupby('heuristic', sort=False):
+        plt.errorbar(group['cost'].mean(), group['time'].mean(), yerr=group['time'].std(), fmt='o', label=labels[heuristic], capsize=6)
+
     plt.legend()
     ax.grid(which = "both")
     ax.minorticks_on()
@@ -195,9 +184,70 @@ def main():
     plt.title('Costo vs Tiempo según heuristica para resolver el mapa A-3 con algoritmo Greedy')
     plt.savefig('images/cost_time_heuristic.png')
 
-    
+    plot_profiles()
+
     plt.show()   
     
 
+# Plots of the profiles written by searches with profiling enabled, if there are any
+def plot_profiles():
+    profiles = []
+    for filename in glob.glob('results/profile_*.json'):
+        with open(filename, 'r') as f:
+            profiles.append(json.load(f))
+    if not profiles:
+        return
+
+    # Heuristic and deadlock times are part of the expansion, they are taken out so the bars add up
+    phases = {
+        'pop': 'Sacar de la frontera',
+        'solution_check': 'Chequear solucion',
+        'expand': 'Generar movimientos',
+        'heuristic': 'Heuristica',
+        'deadlock': 'Bloqueos',
+        'visited': 'Visitados',
+        'push': 'Agregar a la frontera',
+        'prune': 'Poda'
+    }
+    rows = []
+    for profile in profiles:
+        times = {phase: values['time'] for phase, values in profile['phases'].items()}
+        times['expand'] -= times['heuristic'] + times['deadlock']
+        total = sum(times.values())
+        row = {phase: time / total for phase, time in times.items()}
+        row['label'] = f"{profile['name']} {profile['algorithm']} h{profile['heuristic']}"
+        rows.append(row)
+    fractions = pd.DataFrame(rows).groupby('label').mean()
+
+    fig, ax = plt.subplots()
+    left = None
+    for phase, label in phases.items():
+        ax.barh(fractions.index, fractions[phase], left=left, label=label)
+        left = fractions[phase] if left is None else left + fractions[phase]
+    plt.xlabel('Fraccion del tiempo')
+    plt.legend()
+    plt.title('Tiempo por fase de la busqueda')
+    plt.tight_layout()
+    plt.savefig('images/profile_phases.png')
+
+    plt.figure()
+    for profile in profiles:
+        if profile['frontier_sizes']:
+            expanded, frontier = zip(*profile['frontier_sizes'])
+            plt.plot(expanded, frontier, '-', label=f"{profile['name']} {profile['algorithm']} h{profile['heuristic']}")
+    plt.xlabel('Nodos expandidos')
+    plt.ylabel('Nodos en frontera')
+    plt.legend()
+    plt.title('Tamaño de la frontera durante la busqueda')
+    plt.savefig('images/profile_frontier.png')
+
+    plt.figure()
+    branching = pd.DataFrame([{int(children): count for children, count in profile['accepted'].items()} for profile in profiles]).fillna(0).sum()
+    plt.bar(branching.index, branching / branching.sum())
+    plt.xlabel('Hijos agregados a la frontera por nodo expandido')
+    plt.ylabel('Fraccion de los nodos expandidos')
+    plt.title('Factor de ramificacion efectivo')
+    plt.savefig('images/profile_branching.png')
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import numpy as np
+
+# Solutions stored by map, so searches that can only give one answer are not run again.
+# A map and its seven rotations and reflections share one entry: the map is turned into the smallest of the eight
+# as text (its canonical form), and routes are stored in that orientation and turned back when read.
+# Files are <directory>/<map hash>/<settings hash>.json, the map hash includes the search mode
+# since routes found by steps and by pushes are not the same
+
+DIRECTION_VECTORS = {'UP': (-1, 0), 'DOWN': (1, 0), 'LEFT': (0, -1), 'RIGHT': (0, 1)}
+
+# (counterclockwise quarter turns, mirrored left to right after turning)
+SYMMETRIES = [(turns, mirrored) for turns in range(4) for mirrored in (False, True)]
+
+def transform_rows(rows, symmetry):
+    width = max(len(row) for row in rows)
+    cells = np.array([list(row.ljust(width)) for row in rows])
+    turns, mirrored = symmetry
+    cells = np.rot90(cells, turns)
+    if mirrored:
+        cells = np.fliplr(cells)
+    return [''.join(row).rstrip() for row in cells]
+
+def transform_direction(name, symmetry):
+    row, column = DIRECTION_VECTORS[name]
+    turns, mirrored = symmetry
+    for _ in range(turns):
+        row, column = -column, row
+    if mirrored:
+        column = -column
+    return next(direction for direction, vector in DIRECTION_VECTORS.items() if vector == (row, column))
+
+def untransform_direction(name, symmetry):
+    return next(direction for direction in DIRECTION_VECTORS if transform_direction(direction, symmetry) == name)
+
+# Canonical text of the map and the symmetry that takes the map to it
+def canonical_map(rows):
+    return min(('\n'.join(transform_rows(rows, symmetry)), symmetry) for symmetry in SYMMETRIES)
+
+def map_directory(directory, rows, search_mode):
+    text, symmetry = canonical_map(rows)
+    digest = hashlib.sha1(f"{search_mode}\n{text}".encode()).hexdigest()
+    return os.path.join(directory, digest), symmetry
+
+def settings_filename(settings):
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode()).hexdigest() + '.json'
+
+# Cached solution for rows with the given settings, with its route in the orientation of rows, or None
+def lookup_solution(directory, rows, search_mode, settings):
+    path, symmetry = map_directory(directory, rows, search_mode)
+    filename = os.path.join(path, settings_filename(settings))
+    if not os.path.exists(filename):
+        return None
+    with open(filename) as f:
+        entry = json.load(f)
+    entry['route'] = [untransform_direction(name, symmetry) for name in entry['route']]
+    return entry
+
+def store_solution(directory, rows, search_mode, settings, entry):
+    path, symmetry = map_directory(directory, rows, search_mode)
+    os.makedirs(path, exist_ok=True)
+    entry = dict(entry, settings=settings, route=[transform_direction(name, symmetry) for name in entry['route']])
+    filename = os.path.join(path, settings_filename(settings))
+    temporary = f"{filename}.{os.getpid()}.tmp"
+    with open(temporary, 'w') as f:
+        json.dump(entry, f)
+    os.replace(temporary, filename)
+
+# Lowest solution depth any search has cached for the map, a bound on the optimal one
+def upper_bound(directory, rows, search_mode):
+    path, _ = map_directory(directory, rows, search_mode)
+    if not os.path.isdir(path):
+        return float('inf')
+    depths = []
+    for filename in os.listdir(path):
+        if filename.endswith('.json'):
+            with open(os.path.join(path, filename)) as f:
+                depths.append(json.load(f)['depth'])
+    return min(depths, default=float('inf'))
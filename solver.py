@@ -0,0 +1,1234 @@
+from enum import Enum
+import json
+from collections import namedtuple
+from tree import Node, NodeValue
+from frontier import StackFrontier, QueueFrontier, HeapFrontier, BucketFrontier, BeamFrontier
+from grid_aux import load_grid, GridData, UNREACHABLE
+from checkpoint import save_checkpoint, load_checkpoint
+from visited import MemoryVisitedSet, DiskVisitedSet
+from deadlock import is_deadlock
+from pattern_db import load_pattern_database, pattern_database_heuristic
+from profiler import Profile
+import solution_cache
+import numpy as np
+import time
+import logging
+from datetime import datetime
+from collections import deque
+import heapq
+import glob
+import os
+import argparse
+from multiprocessing import Pool
+
+# Define directions
+class Direction(Enum):    
+    UP = (-1, 0)
+    DOWN = (1, 0)
+    LEFT = (0, -1)
+    RIGHT = (0, 1)
+
+# Directions by their index in grid_aux.STEPS, which has the same order
+DIRECTIONS = list(Direction)
+
+MoveResult = namedtuple('MoveResult', ['moved', 'player', 'boxes', 'key', 'box'])
+
+class TreeData:
+    def __init__(self, frontier, expanded_node_count, frontier_node_count, algorithm, heuristic):
+        self.expanded_node_count = expanded_node_count
+        self.frontier_node_count = frontier_node_count
+        self.start_time = time.process_time()
+        self.frontier = frontier
+        self.visited = make_visited_set()
+        # Expanded nodes whose children wait for a duplicate check against the visited set, as (node, children),
+        # and how many nodes are expanded between checks
+        self.pending = []
+        self.block = duplicate_check_block(algorithm)
+        self.algorithm = algorithm
+        self.heuristic = heuristic
+        # Memory bounded algorithms: ida_star caps its transposition table and ma_star its frontier at this many nodes
+        self.memory_budget = config.get('memory_budget', 1000000)
+        # ida_star iteration state
+        self.root = None
+        self.threshold = None
+        self.next_threshold = float('inf')
+        self.transpositions = {}
+        # Once the transposition table is full, a heap of its entries by depth, deepest first, and a tie breaker
+        self.deepest = None
+        self.deepest_count = 0
+        # Cost of a known solution, a_star and ma_star drop nodes whose f goes past it
+        self.upper_bound = float('inf')
+        # weighted_a_star and ara_star keep the best depth of every state reached instead of a visited set.
+        # ara_star also keeps its current weight, the states expanded in the current iteration
+        # and the ones whose depth improved after they were expanded (INCONS)
+        self.best_depth = {}
+        self.weight = None
+        self.closed = set()
+        self.incons = {}
+        # ma_star state, nodes are identified by branch_key. For every node whose children were dropped from the frontier
+        # the dropped children as value -> (direction, depth, heuristic, f), with f backed up from their own dropped
+        # subtrees, and how many children of every expanded node are still in memory
+        self.forgotten = {}
+        self.children = {}
+        # The lowest depth each visited state was reached at, and the states forgotten along with the node that
+        # remembered them, which the same path can generate again
+        self.depths = {}
+        self.released = set()
+        # Per phase timers and histograms, set by initialize_tree when profiling is enabled
+        self.profile = None
+        # Debug mode, every expanded node is written to the task's tree file as the search goes. search opens it
+        self.tree_file = None
+
+    def close(self):
+        self.visited.close()
+        if self.tree_file:
+            self.tree_file.close()
+            self.tree_file = None
+
+    def __str__(self) -> str:
+        return f"Expanded nodes: {self.expanded_node_count}, Frontier nodes: {self.frontier_node_count}"
+
+    def __repr__(self) -> str:
+        return self.__str__()
+    
+
+allowed_algorithms = ['bfs', 'dfs', 'a_star', 'greedy', 'ida_star', 'ma_star', 'hda_star', 'bidirectional', 'weighted_a_star', 'ara_star', 'beam']
+# These start processes of their own, so they run in the main process instead of the task pool
+parallel_algorithms = ['hda_star']
+
+# Searches that can only give one answer are answered from the solution cache unless bypass is set,
+# and a_star and ma_star with a heuristic that never overestimates prune with the best cached solution
+deterministic_algorithms = ['bfs', 'dfs', 'a_star', 'greedy', 'ida_star', 'ma_star', 'bidirectional', 'weighted_a_star', 'beam']
+admissible_heuristics = [1, 4, 5]
+
+# 'memory' keeps visited states in a set, 'disk' packs them in a hash table and spills it to sorted run files once threshold of them are in memory
+allowed_visited_backends = ['memory', 'disk']
+
+# Algorithms that trade solution quality for time: weighted_a_star sorts by depth + weight * heuristic,
+# ara_star does the same starting from initial_weight and lowering it by weight_step after every solution it finds,
+# and beam keeps only the beam_width best nodes of each layer. Their replay files carry the suboptimality bound
+anytime_algorithms = ['weighted_a_star', 'ara_star', 'beam']
+
+# 'step' expands single player moves, 'push' expands only box pushes from the player's reachable area
+allowed_search_modes = ['step', 'push']
+
+# Key of the weighted algorithms, f = depth + weight * heuristic with ties broken by the heuristic
+def weighted_key(weight):
+    return lambda x: (x.depth + weight * x.heuristic, x.heuristic)
+
+# The keys of weighted_a_star and ara_star depend on their weights and are set by load_config
+sorting_options = {
+    'bfs': None,
+    'a_star': lambda x: (x.heuristic + x.depth, x.heuristic),
+    'ma_star': lambda x: (x.heuristic + x.depth, x.heuristic),
+    'greedy': lambda x: (x.heuristic, 0),
+    'beam': lambda x: (x.heuristic + x.depth, x.heuristic)
+}
+
+# Path of the config file processes started by the spawn method read on import, so they search with the same settings
+CONFIG_VARIABLE = 'SOKOBAN_CONFIG'
+
+# Read the settings from a config file into this module's globals, which the rest of the modules read as solver.<name>.
+# Without a path every setting takes its default
+def load_config(path):
+    settings = {}
+    if path is not None:
+        with open(path) as f:
+            settings = json.load(f)
+        os.environ[CONFIG_VARIABLE] = os.path.abspath(path)
+    apply_config(settings)
+
+# Sets the module settings from a config dict. Worker processes get the one of the main process through here,
+# since under spawn and forkserver they only see the config file and not what changed after it was read
+def apply_config(settings):
+    global config, deadlock_detection, macro_moves, profile_config, cache_config, visited_config, anytime_config, budget_config, race_config, checkpoint_config, parallel_config, search_mode
+    config = settings
+    if not set(config.get('algorithms', [])).issubset(set(allowed_algorithms)):
+        raise ValueError(f"Invalid algorithms. Allowed options are {allowed_algorithms}.")
+
+    # Frozen boxes and closed off areas found after a push get an infinite heuristic and are dropped
+    deadlock_detection = config.get('deadlock_detection', True)
+
+    # Pushes into tunnels and goal rooms go on as one move costing a step per push, see grid_aux.compute_macro_paths
+    macro_moves = config.get('macro_moves', False)
+
+    # Opt in profile of every search, written next to its replay file as profile_<...>.json
+    profile_config = config.get('profile', {'enabled': False})
+
+    cache_config = config.get('solution_cache', {'enabled': False})
+
+    visited_config = config.get('visited', {'backend': 'memory'})
+    if visited_config['backend'] not in allowed_visited_backends:
+        raise ValueError(f"Invalid visited backend. Allowed options are {allowed_visited_backends}.")
+    visited_config.setdefault('block', 1000)
+
+    anytime_config = config.get('anytime', {'weight': 2, 'initial_weight': 3, 'weight_step': 0.5, 'beam_width': 100})
+    sorting_options['weighted_a_star'] = weighted_key(anytime_config['weight'])
+    sorting_options['ara_star'] = weighted_key(anytime_config['initial_weight'])
+
+    # Searches run step by step stop once they go past time seconds of wall clock or nodes expanded nodes, null means no limit
+    budget_config = config.setdefault('budget', {'time': None, 'nodes': None})
+
+    # Race mode runs a portfolio of algorithms on each map at the same time and keeps one answer, see race.py
+    race_config = config.setdefault('race', {'enabled': False})
+
+    checkpoint_config = config.get('checkpoint', {'enabled': False, 'interval': 600, 'directory': './checkpoints', 'resume': False})
+    parallel_config = config.get('parallel', {'workers': None, 'batch_size': 64})
+
+    search_mode = config.get('search_mode', 'step')
+    if search_mode not in allowed_search_modes:
+        raise ValueError(f"Invalid search mode. Allowed options are {allowed_search_modes}.")
+
+# The config file of the process that started this one, or config.json in the working directory if there is one
+load_config(os.environ.get(CONFIG_VARIABLE) or ('config.json' if os.path.exists('config.json') else None))
+
+def make_visited_set():
+    if visited_config['backend'] == 'disk':
+        return DiskVisitedSet(visited_config['threshold'], visited_config['directory'])
+    return MemoryVisitedSet()
+
+# Nodes expanded between duplicate checks. With the disk backed visited set bfs checks a whole layer at a time, when
+# its frontier runs out, and a_star and greedy every block nodes. Other searches check each node's children right away
+def duplicate_check_block(algorithm):
+    if visited_config['backend'] != 'disk':
+        return 1
+    if algorithm == 'bfs':
+        return float('inf')
+    if algorithm in ['a_star', 'greedy']:
+        return visited_config['block']
+    return 1
+
+# Frontier type used by each algorithm. Keys of a_star and greedy are pairs of small integers, so they use buckets
+frontier_types = {
+    'dfs': StackFrontier,
+    'ida_star': StackFrontier,
+    'bfs': QueueFrontier,
+    'a_star': BucketFrontier,
+    'greedy': BucketFrontier,
+    'ma_star': HeapFrontier,
+    'weighted_a_star': HeapFrontier,
+    'ara_star': HeapFrontier,
+    'beam': BeamFrontier
+}
+
+def make_frontier(algorithm):
+    frontier_type = frontier_types[algorithm]
+    if frontier_type in (StackFrontier, QueueFrontier):
+        return frontier_type()
+    if frontier_type is BeamFrontier:
+        return BeamFrontier(sorting_options[algorithm], anytime_config['beam_width'])
+    return frontier_type(sorting_options[algorithm])
+
+# Check if the player can move into a cell
+def can_move_into_cell(grid_data: GridData, cell, boxes):
+    return not grid_data.walls[cell] and cell not in boxes
+
+# Move the player. Checks if the player can move into a cell and if there is a box in the cell, if the box can be moved
+# Returns a MoveResult with the new position, the new boxes positions and the new Zobrist key, and a boolean indicating if the player moved
+# box is the new position of the pushed box, or None if no box was pushed
+def move_player(direction: Direction, grid_data: GridData, player, boxes, key=0):
+    offset = grid_data.offset(direction.value)
+    new_position = player + offset
+    if can_move_into_cell(grid_data, new_position, boxes):
+        key ^= grid_data.zobrist_player[player] ^ grid_data.zobrist_player[new_position]
+        return MoveResult(True, new_position, boxes, key, None)
+    elif new_position in boxes:
+        box_new_position = new_position + offset
+        if can_move_into_cell(grid_data, box_new_position, boxes):
+            key ^= grid_data.zobrist_player[player] ^ grid_data.zobrist_player[new_position]
+            key ^= grid_data.zobrist_boxes[new_position] ^ grid_data.zobrist_boxes[box_new_position]
+            return MoveResult(True, new_position, move_box(boxes, new_position, box_new_position), key, box_new_position)
+    return MoveResult(False, player, boxes, key, None)
+
+# Returns the sorted boxes tuple with the box at old_position moved to new_position
+def move_box(boxes, old_position, new_position):
+    aux = list(boxes)
+    aux[boxes.index(old_position)] = new_position
+    aux.sort()
+    return tuple(aux)
+
+# Where a box pushed onto cell along STEPS[step] ends up after its macro move and how many pushes that takes,
+# it goes along the cell's macro path up to the first cell taken by another box
+def macro_push(grid_data: GridData, cell, step, occupied):
+    pushes = 1
+    for following in grid_data.macro_paths[cell][step]:
+        if following in occupied:
+            break
+        cell = following
+        pushes += 1
+    return cell, pushes
+
+# Explore all possible moves from a given node, using the map's move tables (see grid_aux.compute_move_tables)
+# Returns the (state, direction, heuristic, cost) of every child, nodes are only built for the ones that get into the frontier.
+# The cost is 1 but for macro moves, which take a step per push
+def explore_node(node, grid_data, profile=None):
+    children = []
+    player, boxes, key = node.value.player, node.value.boxes, node.value.key
+    occupied = set(boxes)
+    for step, neighbour, player_key, target, box_key in grid_data.moves[player]:
+        if neighbour not in occupied:
+            children.append((NodeValue(neighbour, boxes, key ^ player_key), DIRECTIONS[step], node.heuristic, 1))
+            continue
+        # Pushes into walls, other boxes or dead squares (target is None) can never be solved
+        if target is None or target in occupied:
+            continue
+        new_player, pushes = neighbour, 1
+        if macro_moves and grid_data.macro_paths[target][step]:
+            target, pushes = macro_push(grid_data, target, step, occupied)
+            new_player = target - grid_data.offsets[step]
+            player_key = grid_data.zobrist_player[player] ^ grid_data.zobrist_player[new_player]
+            box_key = grid_data.zobrist_boxes[neighbour] ^ grid_data.zobrist_boxes[target]
+        new_boxes = move_box(boxes, neighbour, target)
+        if profile:
+            start = time.perf_counter()
+        heuristic = update_heuristic(grid_data, node.heuristic, new_boxes, new_player, neighbour, target)
+        if profile:
+            start = profile.add('heuristic', start)
+        if deadlock_detection and is_deadlock(grid_data, new_boxes, target, new_player):
+            heuristic = float('inf')
+        if profile:
+            profile.add('deadlock', start)
+        children.append((NodeValue(new_player, new_boxes, key ^ player_key ^ box_key), DIRECTIONS[step], heuristic, pushes))
+    return children
+
+# Explore all possible box pushes from a given node. The player walks freely inside its reachable area,
+# so states are told apart only by the boxes and the smallest cell of that area. The children's regions are worked
+# out from the node's, so its region has to be that smallest cell already (see initial_node).
+# Children are (state, direction, heuristic, pushes). macros=False leaves macro moves out even when they are enabled,
+# for searches that need every child to be a single push
+def explore_pushes(node, grid_data, profile=None, macros=True):
+    children = []
+    boxes = node.value.boxes
+    occupied = set(boxes)
+    reachable = grid_data.reachable_cells(node.value.player, occupied)
+    for box in boxes:
+        for step, behind, box_new_position, box_key in grid_data.pushes[box]:
+            if behind not in reachable or box_new_position in occupied:
+                continue
+            player, pushes = box, 1
+            if macros and macro_moves and grid_data.macro_paths[box_new_position][step]:
+                box_new_position, pushes = macro_push(grid_data, box_new_position, step, occupied)
+                player = box_new_position - grid_data.offsets[step]
+                box_key = grid_data.zobrist_boxes[box] ^ grid_data.zobrist_boxes[box_new_position]
+            new_boxes = move_box(boxes, box, box_new_position)
+            # The box's cells are swapped in occupied while the new area is walked, and put back after
+            occupied.remove(box)
+            occupied.add(box_new_position)
+            if pushes > 1:
+                # A macro move leaves the player down the tunnel, its area is walked from there
+                connected, area = False, grid_data.reachable_cells(player, occupied)
+            else:
+                connected = box_new_position not in reachable or grid_data.keeps_connected(box_new_position, occupied)
+                if not connected:
+                    # Walk until the cells around the box's new cell are found, if some never are the walk covered the whole new area
+                    area, connected = grid_data.reaches(box, occupied, [cell for cell in grid_data.neighbours[box_new_position] if cell not in occupied])
+            if connected:
+                # The player still reaches all of its area but the box's new cell, so only the cells opened up by the push are walked
+                region = node.value.region
+                if region == box_new_position:
+                    region = min(cell for cell in reachable if cell != box_new_position)
+                region = min(region, min(grid_data.reachable_cells(box, occupied, reachable)))
+            else:
+                region = min(area)
+            occupied.remove(box_new_position)
+            occupied.add(box)
+            key = node.value.key ^ grid_data.zobrist_player[node.value.region] ^ grid_data.zobrist_player[region] ^ box_key
+            if profile:
+                start = time.perf_counter()
+            heuristic = update_heuristic(grid_data, node.heuristic, new_boxes, player, box, box_new_position)
+            if profile:
+                start = profile.add('heuristic', start)
+            if deadlock_detection and is_deadlock(grid_data, new_boxes, box_new_position, player):
+                heuristic = float('inf')
+            if profile:
+                profile.add('deadlock', start)
+            children.append((NodeValue(player, new_boxes, key, region), DIRECTIONS[step], heuristic, pushes))
+    return children
+
+# Shortest walk of the player between two cells without pushing any box
+def walk_route(grid_data: GridData, start, target, boxes):
+    previous = {start: None}
+    queue = deque([start])
+    while queue:
+        cell = queue.popleft()
+        if cell == target:
+            break
+        for direction in Direction:
+            neighbour = cell + grid_data.offset(direction.value)
+            if neighbour not in previous and can_move_into_cell(grid_data, neighbour, boxes):
+                previous[neighbour] = (cell, direction)
+                queue.append(neighbour)
+    route = []
+    while previous[target]:
+        target, direction = previous[target]
+        route.append(direction)
+    return route[::-1]
+
+# Expand a list of (box, direction) pushes into single player moves, walking to each push
+def expand_pushes(grid_data: GridData, player, boxes, pushes):
+    route = []
+    for box, direction in pushes:
+        offset = grid_data.offset(direction.value)
+        route.extend(walk_route(grid_data, player, box - offset, boxes))
+        route.append(direction)
+        player = box
+        boxes = move_box(boxes, box, box + offset)
+    return route
+
+# Directions from the root of the tree to the given node
+def build_route(grid_data: GridData, node):
+    nodes = []
+    while node.parent:
+        nodes.append(node)
+        node = node.parent
+    nodes.reverse()
+    # A child deeper than its parent by more than one was reached by a macro move, a push per level in a straight line
+    if search_mode == 'step':
+        return [child.direction.name for child in nodes for _ in range(child.depth - child.parent.depth)]
+    # In push mode every node stores the pushed box's former cell as the player position
+    pushes = []
+    for child in nodes:
+        offset = grid_data.offset(child.direction.value)
+        pushes.extend((child.value.player - i * offset, child.direction) for i in reversed(range(child.depth - child.parent.depth)))
+    return [direction.name for direction in expand_pushes(grid_data, node.value.player, node.value.boxes, pushes)]
+
+def execute_step(grid_data: GridData, data: TreeData):
+    step_result = algorithm_step(grid_data, data)
+    new_position = step_result[0]
+    grid_data.player = new_position.value.player
+    grid_data.boxes = new_position.value.boxes
+
+    if step_result[1]:
+        bound = solution_bound(data, new_position)
+        write_solution(grid_data, data, new_position, time.process_time() - data.start_time, bound=bound)
+        if search_goes_on(data, new_position, bound):
+            return False
+        data.close()
+        return True
+    
+    if data.frontier_node_count == 0:
+        if search_goes_on(data):
+            return False
+        print(f"Expanded nodes: {data.expanded_node_count}, Frontier nodes: {data.frontier_node_count}")
+        # ara_star already wrote its solutions when a later iteration finds nothing better
+        better = data.upper_bound < float('inf')
+        print("No better solution found" if better else "No solution found")
+        write_profile(grid_data, data, time.process_time() - data.start_time, 'no_better_solution' if better else 'no_solution')
+        data.close()
+        return True
+
+    return False
+    
+# Whether the search keeps going after finding a solution in node, or after its frontier runs out when node is None.
+# Only ara_star does, looking for better solutions in a new iteration
+def search_goes_on(data: TreeData, node=None, bound=None):
+    if data.algorithm != 'ara_star':
+        return False
+    if node is None:
+        return bool(data.incons) and start_ara_iteration(data)
+    data.upper_bound = node.depth - 1
+    return bound != 1 and data.weight > 1 and start_ara_iteration(data)
+
+# Log the solution ending in node and write its replay file
+# route is read from the node's parents unless given, for searches that do not end on a single chain of nodes
+# bound is the solution's suboptimality bound, written for the anytime algorithms. extra is added to the replay file as is
+def write_solution(grid_data: GridData, data: TreeData, node, elapsed_time, route=None, bound=None, extra=None):
+    message = f"Grid: {grid_data.name}\nSolution found with '{data.algorithm}' algorithm and heuristic {data.heuristic}\n{data}\nRoute depth: {node.depth}"
+    if data.algorithm in anytime_algorithms:
+        message += f"\nSuboptimality bound: {bound}"
+    print(message)
+    logging.info(message)
+    if route is None:
+        route = build_route(grid_data, node)
+    logging.info(route)
+    # Depth in the units searches count, bidirectional searches by pushes even in step mode
+    depth = len(route) if search_mode == 'step' else node.depth
+    while node.parent:
+        node = node.parent
+
+    json_data = {
+        "grid": grid_data.original(node.value.player, node.value.boxes),
+        "name": grid_data.name,
+        "route": route,
+        "algorithm": data.algorithm,
+        "search_mode": search_mode,
+        "cost": len(route),
+        "expanded_nodes": data.expanded_node_count,
+        "frontier_nodes": data.frontier_node_count,
+        "time": elapsed_time,
+        "heuristic": data.heuristic
+    }
+    if data.algorithm in anytime_algorithms:
+        json_data["bound"] = bound
+    if extra:
+        json_data.update(extra)
+    with open_result_file(f"replay_{grid_data.name}_{data.algorithm}_{data.heuristic}") as f:
+        json.dump(json_data, f)
+    write_profile(grid_data, data, elapsed_time, 'solution', f.name)
+    if cache_config["enabled"] and data.algorithm in deterministic_algorithms:
+        entry = {key: json_data[key] for key in ["route", "expanded_nodes", "frontier_nodes", "time"]}
+        entry["depth"] = depth
+        solution_cache.store_solution(cache_config["directory"], json_data["grid"], search_mode, solution_settings(data.algorithm, data.heuristic), entry)
+
+# Write the search's profile, if it has one, as profile_<...>.json. outcome is how the search ended: solution, no_solution,
+# no_better_solution or out_of_budget. A solution's profile goes next to its replay file, with the same number
+def write_profile(grid_data: GridData, data: TreeData, elapsed_time, outcome, replay_filename=None):
+    if not data.profile:
+        return
+    if replay_filename:
+        profile_file = open(os.path.join(os.path.dirname(replay_filename), os.path.basename(replay_filename).replace("replay_", "profile_", 1)), 'w')
+    else:
+        profile_file = open_result_file(f"profile_{grid_data.name}_{data.algorithm}_{data.heuristic}")
+    with profile_file:
+        json.dump(dict(data.profile.to_json(), name=grid_data.name, algorithm=data.algorithm, heuristic=data.heuristic,
+                       expanded_nodes=data.expanded_node_count, time=elapsed_time, outcome=outcome), profile_file)
+
+# Everything besides the map that can change a search's result
+def solution_settings(algorithm, heuristic):
+    settings = {
+        "algorithm": algorithm,
+        "heuristic": heuristic,
+        "deadlock_detection": deadlock_detection,
+        "macro_moves": macro_moves,
+        "memory_budget": config.get('memory_budget', 1000000)
+    }
+    if algorithm == 'weighted_a_star':
+        settings["weight"] = anytime_config['weight']
+    elif algorithm == 'beam':
+        settings["beam_width"] = anytime_config['beam_width']
+    # Nodes expanded ahead of the duplicate check change which path reaches a state first
+    if algorithm in ['a_star', 'greedy'] and duplicate_check_block(algorithm) > 1:
+        settings["block"] = visited_config['block']
+    return settings
+
+# Write the replay of a cached solution as if the search had just found it, with the counts and time of that search
+def write_cached_solution(grid_data: GridData, entry, algorithm, heuristic):
+    data = TreeData(None, entry["expanded_nodes"], entry["frontier_nodes"], algorithm, heuristic)
+    route = entry["route"]
+    message = f"Grid: {grid_data.name}\nSolution found with '{algorithm}' algorithm and heuristic {heuristic} (cached)\n{data}\nRoute depth: {entry['depth']}"
+    print(message)
+    logging.info(message)
+    logging.info(route)
+    json_data = {
+        "grid": grid_data.original(grid_data.player, grid_data.boxes),
+        "name": grid_data.name,
+        "route": route,
+        "algorithm": algorithm,
+        "search_mode": search_mode,
+        "cost": len(route),
+        "expanded_nodes": entry["expanded_nodes"],
+        "frontier_nodes": entry["frontier_nodes"],
+        "time": entry["time"],
+        "heuristic": heuristic,
+        "cached": True
+    }
+    if algorithm in anytime_algorithms:
+        json_data["bound"] = solution_bound(data, None)
+    with open_result_file(f"replay_{grid_data.name}_{algorithm}_{heuristic}") as f:
+        json.dump(json_data, f)
+    data.close()
+    return data
+
+# Opens ./results/<prefix>_<i>.json with the first free i. Files are created exclusively,
+# so workers writing results for the same grid at the same time never pick the same name
+def open_result_file(prefix):
+    os.makedirs("./results", exist_ok=True)
+    i = 0
+    while True:
+        try:
+            return open(f"./results/{prefix}_{i}.json", 'x')
+        except FileExistsError:
+            i += 1
+
+def algorithm_step(grid_data: GridData, data: TreeData):
+    profile = data.profile
+    if profile:
+        start = time.perf_counter()
+    node = data.frontier.pop()
+    if profile:
+        start = profile.add('pop', start)
+    # The weighted algorithms leave a state's old entries in the frontier when they find it again with a lower depth
+    if data.best_depth and data.best_depth[node.value] < node.depth:
+        data.frontier_node_count -= 1
+        return node, False
+
+    if is_solution(grid_data, node.value.boxes):
+        # Children still waiting for their duplicate check go in the frontier first. bfs ends there, their depth
+        # can't beat the solution's, the others put the solution back in case one of them comes before it
+        if data.pending:
+            push_pending(data)
+            if data.algorithm != 'bfs':
+                data.frontier.push(node)
+                return node, False
+        return node, True
+    if profile:
+        start = profile.add('solution_check', start)
+    if data.algorithm == 'ma_star':
+        # Nodes whose state was reached again through a shorter path are dropped
+        if data.depths[node.value] < node.depth:
+            data.frontier_node_count -= 1
+            drop_forgotten(data, node)
+            release_branch(data, node)
+            return node, False
+        # A parent back in the frontier only brings back the children it forgot
+        if branch_key(node) in data.forgotten:
+            data.expanded_node_count += 1
+            data.frontier_node_count -= 1
+            regenerate_children(data, node)
+            if len(data.frontier) > data.memory_budget:
+                prune_frontier(data)
+            return node, False
+    
+    if search_mode == 'push':
+        children = explore_pushes(node, grid_data, profile)
+    else:
+        children = explore_node(node, grid_data, profile)
+    if profile:
+        start = profile.add('expand', start)
+    data.expanded_node_count += 1
+    data.frontier_node_count -= 1
+    frontier_node_count = data.frontier_node_count
+    if data.tree_file:
+        data.tree_file.write("\t" * node.depth + repr(node) + "\n")
+    if data.algorithm == 'ida_star':
+        for value, direction, heuristic, cost in children:
+            push_bounded_child(data, node, value, direction, heuristic, cost)
+    elif data.best_depth:
+        if data.algorithm == 'ara_star':
+            data.closed.add(node.value)
+        for value, direction, heuristic, cost in children:
+            push_weighted_child(data, node, value, direction, heuristic, cost)
+    else:
+        data.pending.append((node, children))
+        if len(data.pending) >= data.block or not data.frontier:
+            if profile:
+                start = push_pending(data, start)
+            else:
+                push_pending(data)
+    if profile:
+        start = profile.add('push', start)
+        accepted_count = data.frontier_node_count - frontier_node_count
+
+    if data.algorithm == 'ida_star' and not data.frontier:
+        start_ida_iteration(data)
+    elif data.algorithm == 'ma_star' and len(data.frontier) > data.memory_budget:
+        prune_frontier(data)
+    elif data.algorithm == 'beam':
+        # Nodes left out of the beam are dropped when a layer starts
+        data.frontier_node_count = len(data.frontier)
+    if profile:
+        profile.add('prune', start)
+        profile.record_expansion(data.expanded_node_count, data.frontier_node_count, children, accepted_count)
+    return node, False
+
+# Check the children of the pending nodes against the visited set all at once, so a disk backed set looks them up in
+# a single batch, and push the new ones. A state reached twice in the batch keeps the first path, like it would
+# if the nodes had been checked one by one. When profiling, start is when the check began and the end of the check is returned
+def push_pending(data: TreeData, start=None):
+    viable = []
+    for node, children in data.pending:
+        for value, direction, heuristic, cost in children:
+            depth = node.depth + cost
+            if heuristic < float('inf') and depth + heuristic <= data.upper_bound:
+                viable.append((node, value, direction, depth, heuristic))
+    new_states = data.visited.new_states([value for _, value, _, _, _ in viable])
+    if start is not None:
+        start = data.profile.add('visited', start)
+    added = []
+    accepted = 0
+    for (node, value, direction, depth, heuristic), new in zip(viable, new_states):
+        # ma_star takes a visited state again through a shorter path, or through the same one once it forgot it
+        revisited = not new and data.algorithm == 'ma_star' and (depth < data.depths[value] or (depth == data.depths[value] and value in data.released))
+        if new or revisited:
+            data.frontier.push(Node(value, node, direction, depth, heuristic))
+            data.frontier_node_count += 1
+            if new:
+                added.append(value)
+            if data.algorithm == 'ma_star':
+                data.depths[value] = depth
+                data.released.discard(value)
+            accepted += 1
+    data.visited.add_states(added)
+    if data.algorithm == 'ma_star':
+        # ma_star checks every node on its own, the batch is a single node's children
+        node = data.pending[0][0]
+        data.children[branch_key(node)] = accepted
+        release_branch(data, node)
+    data.pending = []
+    return start
+
+# IDA* only follows children inside the current f threshold, the smallest f past it becomes the next threshold.
+# States already reached with a lower or equal depth in this iteration are skipped, that table is capped at the memory budget
+def push_bounded_child(data: TreeData, node, value, direction, heuristic, cost):
+    f = node.depth + cost + heuristic
+    if f > data.threshold:
+        data.next_threshold = min(data.next_threshold, f)
+        return
+    depth = data.transpositions.get(value)
+    if depth is not None and depth <= node.depth + cost:
+        return
+    record_transposition(data, value, node.depth + cost)
+    data.frontier.push(Node(value, node, direction, node.depth + cost, heuristic))
+    data.frontier_node_count += 1
+
+# Once the ida_star transposition table is full, a state reached closer to the root takes the place of the deepest one.
+# States near the root cut off the largest subtrees, keeping the first ones found left the search without any check
+# further down and it blew up on the paths a step can take around the same cells
+def record_transposition(data: TreeData, value, depth):
+    table = data.transpositions
+    if value not in table and len(table) >= data.memory_budget:
+        if data.deepest is None:
+            data.deepest = [(-recorded, index, state) for index, (state, recorded) in enumerate(table.items())]
+            data.deepest_count = len(table)
+            heapq.heapify(data.deepest)
+        # Entries left behind when a state was reached again with a lower depth are skipped
+        while table.get(data.deepest[0][2]) != -data.deepest[0][0]:
+            heapq.heappop(data.deepest)
+        if -data.deepest[0][0] <= depth:
+            return
+        del table[heapq.heappop(data.deepest)[2]]
+    table[value] = depth
+    if data.deepest is not None:
+        heapq.heappush(data.deepest, (-depth, data.deepest_count, value))
+        data.deepest_count += 1
+
+# Weighted A* and ARA* take a state again when it is reached with a lower depth than before. In ARA* a state that was
+# already expanded in the current iteration waits in INCONS until the next one instead of going back to the frontier
+def push_weighted_child(data: TreeData, node, value, direction, heuristic, cost):
+    depth = node.depth + cost
+    if heuristic == float('inf') or depth + heuristic > data.upper_bound or depth >= data.best_depth.get(value, float('inf')):
+        return
+    data.best_depth[value] = depth
+    child = Node(value, node, direction, depth, heuristic)
+    if value in data.closed:
+        data.incons[value] = child
+        return
+    data.frontier.push(child)
+    data.frontier_node_count += 1
+
+# Suboptimality bound of a solution found by an anytime algorithm: its cost is at most bound times the optimal one.
+# Only heuristics that never overestimate give one, and beam search never does. For ara_star the bound can be
+# tighter than the weight, the optimal cost is at least the lowest depth + heuristic still waiting to be expanded
+def solution_bound(data: TreeData, node):
+    if data.algorithm not in ['weighted_a_star', 'ara_star'] or data.heuristic not in admissible_heuristics:
+        return None
+    if data.algorithm == 'weighted_a_star':
+        return anytime_config['weight']
+    waiting = [entry[2] for entry in data.frontier.entries if data.best_depth[entry[2].value] == entry[2].depth]
+    waiting.extend(data.incons.values())
+    lowest = min((waiting_node.depth + waiting_node.heuristic for waiting_node in waiting), default=node.depth)
+    if lowest >= node.depth:
+        return 1
+    return min(data.weight, node.depth / lowest)
+
+# A new ARA* iteration starts after each solution, looking only for better ones, and when the frontier runs out
+# while INCONS still has states. The weight goes down by weight_step (not below 1), the INCONS states go back
+# to the frontier and it is sorted again with the new weight. Returns False when nothing is left to expand
+def start_ara_iteration(data: TreeData):
+    waiting = [entry[2] for entry in data.frontier.entries if data.best_depth[entry[2].value] == entry[2].depth]
+    waiting.extend(data.incons.values())
+    if not waiting:
+        return False
+    data.weight = max(1, data.weight - anytime_config['weight_step'])
+    data.frontier = HeapFrontier(weighted_key(data.weight))
+    for waiting_node in waiting:
+        data.frontier.push(waiting_node)
+    data.frontier_node_count = len(data.frontier)
+    data.closed = set()
+    data.incons = {}
+    return True
+
+# Restart the depth first search from the root with the next threshold, if any child went past the current one
+def start_ida_iteration(data: TreeData):
+    if data.next_threshold == float('inf'):
+        return
+    data.threshold = data.next_threshold
+    data.next_threshold = float('inf')
+    data.transpositions = {data.root.value: 0}
+    data.deepest = None
+    data.frontier.push(data.root)
+    data.frontier_node_count += 1
+
+# Keep the ma_star frontier inside the memory budget, SMA* style. The worst leaves (frontier nodes without children
+# in memory) are dropped and remembered by their parents with their f, and a parent goes back to the frontier with
+# the lowest f among its dropped children. Dropped parents pass that f on to their own parents, so the f of a
+# forgotten subtree is never lost and it is only generated again once nothing better is left. The backed up f only
+# goes in the sort key, children take their heuristic from the one of their parent.
+# Parents replace children one level at a time until the frontier gets down to half the budget
+def prune_frontier(data: TreeData):
+    frontier = data.frontier.entries
+    target = data.memory_budget // 2
+    while len(frontier) > target:
+        frontier.sort()
+        kept = frontier[:target]
+        parents = {}
+        for entry in frontier[target:]:
+            node = entry[2]
+            # The root has nothing to fall back to, and nodes with children in memory are still needed by them
+            if node.parent is None or data.children.get(branch_key(node)):
+                kept.append(entry)
+                continue
+            forget_node(data, node, entry[0][0])
+            parents[branch_key(node.parent)] = node.parent
+        if not parents:
+            break
+        # Parents already in the frontier get their key updated, parents forgotten in the same pass passed their f on
+        frontier = [entry for entry in kept if branch_key(entry[2]) not in parents]
+        for key, parent in parents.items():
+            if key in data.children:
+                f = min(f for _, _, _, f in data.forgotten[key].values())
+                frontier.append((backed_key(parent, f), data.frontier.count, parent))
+                data.frontier.count += 1
+    heapq.heapify(frontier)
+    data.frontier.entries = frontier
+    data.frontier_node_count = len(frontier)
+
+# ma_star tells nodes apart by state and depth, a state can be left in memory by a longer path after a shorter one found it
+def branch_key(node):
+    return node.value, node.depth
+
+# ma_star sort key for a node whose f was backed up from its forgotten children
+def backed_key(node, f):
+    return f, f - node.depth
+
+# Drop a leaf with sort key f from memory, its parent remembers it. Any children the leaf itself had forgotten are
+# summed up in f, and the parent goes back to the frontier for its forgotten children only with the lowest f among them
+def forget_node(data: TreeData, node, f):
+    parent = branch_key(node.parent)
+    drop_forgotten(data, node)
+    data.children.pop(branch_key(node), None)
+    data.forgotten.setdefault(parent, {})[node.value] = (node.direction, node.depth, node.heuristic, f)
+    data.children[parent] -= 1
+
+# The children node had forgotten are only left in its f from now on, the same path can take their states again
+def drop_forgotten(data: TreeData, node):
+    for value, (_, depth, _, _) in data.forgotten.pop(branch_key(node), {}).items():
+        if data.depths[value] == depth:
+            data.released.add(value)
+
+# Push back the children node had forgotten, with their backed up f. Forgotten states stay visited, the budget only
+# bounds the frontier, so longer paths can't take them in the meantime. The ones a shorter path found are left out
+def regenerate_children(data: TreeData, node):
+    key = branch_key(node)
+    for value, (direction, depth, heuristic, f) in data.forgotten.pop(key).items():
+        if data.depths[value] == depth:
+            child = Node(value, node, direction, depth, heuristic)
+            data.frontier.push(child, backed_key(child, f))
+            data.frontier_node_count += 1
+            data.children[key] = data.children.get(key, 0) + 1
+    release_branch(data, node)
+
+# An expanded node that has no children in memory and none forgotten is a dead end, the count of its parent goes down
+# and so on up the branch, so dead branches don't keep their ancestors from being forgotten
+def release_branch(data: TreeData, node):
+    while node.parent is not None and not data.children.get(branch_key(node)) and branch_key(node) not in data.forgotten:
+        data.children.pop(branch_key(node), None)
+        node = node.parent
+        data.children[branch_key(node)] -= 1
+
+# Decide if the game has been solved
+def is_solution(grid_data, boxes):
+    return grid_data.objectives.issuperset(boxes)
+
+
+# The heuristic used is the one the search was initialized with, stored in grid_data.heuristic_type
+def calculate_heuristic(grid_data, boxes, player):
+    if grid_data.heuristic_type == 1:
+        return calculate_first_heuristic(grid_data, boxes, player)
+    elif grid_data.heuristic_type == 2:
+        return calculate_second_heuristic(grid_data, boxes, player)
+    elif grid_data.heuristic_type == 3:
+        return calculate_third_heuristic(grid_data, boxes, player)
+    elif grid_data.heuristic_type == 4:
+        return calculate_fourth_heuristic(grid_data, boxes, player)
+    elif grid_data.heuristic_type == 5:
+        # Both are lower bounds, pairs catch boxes in each other's way and the matching catches boxes after the same objective
+        return max(pattern_database_heuristic(grid_data, boxes), calculate_fourth_heuristic(grid_data, boxes, player))
+    else:
+        raise ValueError(f"Invalid heuristic: {grid_data.heuristic_type}. Allowed options are 1, 2, 3, 4 and 5.")
+
+# Manhattan distance between two flattened cells
+def manhattan_distance(grid_data, first, second):
+    first_row, first_column = divmod(first, grid_data.width)
+    second_row, second_column = divmod(second, grid_data.width)
+    return abs(first_row - second_row) + abs(first_column - second_column)
+
+# Heuristic of a child from its parent's, where old_box was pushed to new_box (None if nothing was pushed).
+# Only the pushed box's term changes, heuristics that are a sum of per box terms swap that term,
+# the matching ones (2 and 4) are recomputed
+def update_heuristic(grid_data, heuristic, boxes, player, old_box, new_box):
+    if new_box is None:
+        return heuristic
+    terms = grid_data.heuristic_terms.get(grid_data.heuristic_type)
+    if terms is not None:
+        return heuristic - terms[old_box] + terms[new_box]
+    return calculate_heuristic(grid_data, boxes, player)
+
+# Per cell terms of the heuristics that add one value per box, computed once per map
+def compute_heuristic_terms(grid_data):
+    floor = [cell for cell, wall in enumerate(grid_data.walls) if not wall]
+    closest = [0 for _ in grid_data.walls]
+    farthest = [0 for _ in grid_data.walls]
+    for cell in floor:
+        distances = [manhattan_distance(grid_data, obj, cell) for obj in grid_data.objectives]
+        closest[cell] = min(distances)
+        farthest[cell] = max(distances)
+    return {1: closest, 3: farthest}
+
+def calculate_first_heuristic(grid_data, boxes, player):
+    closest = grid_data.heuristic_terms[1]
+    return sum([closest[box] for box in boxes])
+
+def calculate_second_heuristic(grid_data, boxes, player):
+    base_value = 0
+    objectives = sorted(grid_data.objectives)
+    objectives_assigned = [False for _ in objectives]
+
+    for box in boxes:
+        min_distance = float('inf')
+        min_index = -1
+        for i, obj in enumerate(objectives):
+            if objectives_assigned[i]:
+                continue
+            distance = manhattan_distance(grid_data, obj, box)
+            if distance < min_distance:
+                min_distance = distance
+                min_index = i
+        if min_index != -1:
+            objectives_assigned[min_index] = True
+        base_value += min_distance
+    return base_value
+
+# calculate the distance from each box to the farthest objective
+def calculate_third_heuristic(grid_data, boxes, player):
+    farthest = grid_data.heuristic_terms[3]
+    return sum([farthest[box] for box in boxes])
+
+# Optimal box to objective assignment over the precomputed push distances
+def calculate_fourth_heuristic(grid_data, boxes, player):
+    distances = grid_data.push_distances[list(boxes)]
+    closest = distances.argmin(axis=1)
+    # When every box has a different closest objective that assignment is already optimal
+    if np.unique(closest).size == closest.size:
+        cost = int(distances[np.arange(closest.size), closest].sum())
+    else:
+        cost = min_cost_matching(distances)
+    return cost if cost < UNREACHABLE else float('inf')
+
+# Hungarian algorithm (shortest augmenting paths with potentials) for a square cost matrix.
+# The inner loop over columns runs as NumPy vector operations
+def min_cost_matching(cost):
+    n = cost.shape[0]
+    u = np.zeros(n + 1, dtype=np.int64)
+    v = np.zeros(n + 1, dtype=np.int64)
+    assigned = np.zeros(n + 1, dtype=np.int64)
+    way = np.zeros(n + 1, dtype=np.int64)
+    for row in range(1, n + 1):
+        assigned[0] = row
+        column = 0
+        min_values = np.full(n + 1, np.iinfo(np.int64).max)
+        used = np.zeros(n + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current_row = assigned[column]
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+            free = ~used[1:]
+            improved = free & (reduced < min_values[1:])
+            min_values[1:][improved] = reduced[improved]
+            way[1:][improved] = column
+            candidates = np.where(free, min_values[1:], np.iinfo(np.int64).max)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            u[assigned[used]] += delta
+            v[used] -= delta
+            min_values[~used] -= delta
+            column = next_column
+            if assigned[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            assigned[column] = assigned[previous]
+            column = previous
+    return int(-v[0])
+
+# Root node of a search with the given heuristic, also sets the heuristic up on grid_data
+# mode is the search mode the node is built for, the configured one if None
+def initial_node(grid_data: GridData, heuristic_type: int, mode=None):
+    grid_data.heuristic_type = heuristic_type
+    grid_data.heuristic_terms = compute_heuristic_terms(grid_data)
+    if heuristic_type == 5:
+        grid_data.pattern_database = load_pattern_database(grid_data, config.get('pattern_database', {}).get('directory', './pattern_db'))
+    heuristic = calculate_heuristic(grid_data, grid_data.boxes, grid_data.player)
+    region = grid_data.player if (mode or search_mode) == 'step' else min(grid_data.reachable_cells(grid_data.player, set(grid_data.boxes)))
+    return Node(NodeValue(grid_data.player, grid_data.boxes, grid_data.zobrist(region, grid_data.boxes), region), heuristic=heuristic)
+
+def initialize_tree(grid_data: GridData, algorithm: str, heuristic_type: int):
+    first_node = initial_node(grid_data, heuristic_type)
+    heuristic = first_node.heuristic
+    frontier = make_frontier(algorithm)
+    frontier.push(first_node)
+
+    explore_data = TreeData(frontier, 0, 1, algorithm, heuristic_type)
+    if profile_config['enabled']:
+        explore_data.profile = Profile(profile_config['sample_interval'])
+    if cache_config["enabled"] and cache_config["upper_bound"] and algorithm in ['a_star', 'ma_star'] and heuristic_type in admissible_heuristics:
+        explore_data.upper_bound = solution_cache.upper_bound(cache_config["directory"], grid_data.original(grid_data.player, grid_data.boxes), search_mode)
+    if algorithm == 'ma_star':
+        explore_data.visited.add(first_node.value)
+        explore_data.depths[first_node.value] = 0
+    if algorithm == 'ida_star':
+        explore_data.root = first_node
+        explore_data.threshold = heuristic
+        explore_data.transpositions[first_node.value] = 0
+    if algorithm in ['weighted_a_star', 'ara_star']:
+        explore_data.best_depth[first_node.value] = 0
+        explore_data.weight = anytime_config['initial_weight'] if algorithm == 'ara_star' else anytime_config['weight']
+    return explore_data
+
+# Everything needed to go on with a search, the frontier is kept without its sorting key since lambdas can't be pickled
+def checkpoint_state(grid_data: GridData, data: TreeData):
+    return {
+        "grid_data": grid_data,
+        "search_mode": search_mode,
+        "algorithm": data.algorithm,
+        "heuristic": data.heuristic,
+        "frontier": {name: value for name, value in vars(data.frontier).items() if name != 'key'},
+        "visited": data.visited,
+        "pending": data.pending,
+        "expanded_node_count": data.expanded_node_count,
+        "frontier_node_count": data.frontier_node_count,
+        "elapsed_time": time.process_time() - data.start_time,
+        "root": data.root,
+        "threshold": data.threshold,
+        "next_threshold": data.next_threshold,
+        "transpositions": data.transpositions,
+        "deepest": data.deepest,
+        "deepest_count": data.deepest_count,
+        "upper_bound": data.upper_bound,
+        "best_depth": data.best_depth,
+        "weight": data.weight,
+        "closed": data.closed,
+        "incons": data.incons,
+        "forgotten": data.forgotten,
+        "children": data.children,
+        "depths": data.depths,
+        "released": data.released,
+        "profile": data.profile
+    }
+
+# Rebuild the grid and the tree data saved in a checkpoint, the elapsed time carries on from the saved one
+def restore_checkpoint(path):
+    state = load_checkpoint(path, Direction)
+    if state["search_mode"] != search_mode:
+        raise ValueError(f"Checkpoint {path} was saved in '{state['search_mode']}' search mode, the current one is '{search_mode}'.")
+    frontier = make_frontier(state["algorithm"])
+    vars(frontier).update(state["frontier"])
+    data = TreeData(frontier, state["expanded_node_count"], state["frontier_node_count"], state["algorithm"], state["heuristic"])
+    data.start_time = time.process_time() - state["elapsed_time"]
+    data.visited = state["visited"]
+    data.pending = state["pending"]
+    data.root = state["root"]
+    data.threshold = state["threshold"]
+    data.next_threshold = state["next_threshold"]
+    data.transpositions = state["transpositions"]
+    data.deepest = state["deepest"]
+    data.deepest_count = state["deepest_count"]
+    data.upper_bound = state["upper_bound"]
+    data.best_depth = state["best_depth"]
+    data.weight = state["weight"]
+    data.closed = state["closed"]
+    data.incons = state["incons"]
+    data.forgotten = state["forgotten"]
+    data.children = state["children"]
+    data.depths = state["depths"]
+    data.released = state["released"]
+    if data.algorithm == 'ara_star':
+        frontier.key = weighted_key(data.weight)
+    data.profile = state["profile"]
+    return state["grid_data"], data
+
+def checkpoint_path(checkpoint_name):
+    return os.path.join(checkpoint_config["directory"], f"{checkpoint_name}.ckpt")
+
+# Run a search to the end or until it runs out of budget, printing the elapsed time every print_delta_time seconds.
+# With a checkpoint name the search is saved every checkpoint interval, and picked up from there when resume is set
+# tree_path is where the expanded nodes go in debug mode, the searches that don't expand nodes one at a time ignore it
+def search(grid_data: GridData, algorithm, heuristic, checkpoint_name=None, tree_path=None):
+    if algorithm == 'race':
+        from race import race_search
+        return race_search(grid_data)
+    if cache_config["enabled"] and not cache_config["bypass"] and algorithm in deterministic_algorithms:
+        entry = solution_cache.lookup_solution(cache_config["directory"], grid_data.original(grid_data.player, grid_data.boxes), search_mode, solution_settings(algorithm, heuristic))
+        if entry:
+            return write_cached_solution(grid_data, entry, algorithm, heuristic)
+    if algorithm in parallel_algorithms:
+        from hda_star import parallel_search
+        return parallel_search(grid_data, heuristic, parallel_config['workers'] or os.cpu_count(), parallel_config['batch_size'])
+    if algorithm == 'bidirectional':
+        from bidirectional import bidirectional_search
+        return bidirectional_search(grid_data, heuristic)
+    path = checkpoint_path(checkpoint_name) if checkpoint_name else None
+    if path and checkpoint_config["resume"] and os.path.exists(path):
+        print(f"Resuming from {path}")
+        grid_data, explore_data = restore_checkpoint(path)
+    else:
+        explore_data = initialize_tree(grid_data, algorithm, heuristic)
+    if tree_path:
+        explore_data.tree_file = open(tree_path, 'w')
+    return run_search(grid_data, explore_data, path)
+
+def run_search(grid_data: GridData, explore_data: TreeData, path=None):
+    start_time = time.process_time()
+    last_time = start_time
+    last_checkpoint = start_time
+    checkpoints = path is not None and checkpoint_config["enabled"]
+    deadline = time.perf_counter() + budget_config['time'] if budget_config.get('time') else float('inf')
+    node_budget = budget_config.get('nodes') or float('inf')
+    while not execute_step(grid_data, explore_data):
+        if time.perf_counter() > deadline or explore_data.expanded_node_count >= node_budget:
+            message = f"Grid: {grid_data.name}\nOut of budget with '{explore_data.algorithm}' algorithm and heuristic {explore_data.heuristic}\n{explore_data}"
+            print(message)
+            logging.info(message)
+            # The checkpoint stays, saved where the search stopped, so resume can take it further with a larger budget
+            if checkpoints:
+                save_checkpoint(path, checkpoint_state(grid_data, explore_data))
+            write_profile(grid_data, explore_data, time.process_time() - explore_data.start_time, 'out_of_budget')
+            explore_data.close()
+            return explore_data
+        current_time = time.process_time()
+        if (current_time - last_time) > config.get('print_delta_time', 30):
+            print(f"Time: {current_time - start_time:.2f}")
+            last_time = current_time
+        if checkpoints and (current_time - last_checkpoint) > checkpoint_config["interval"]:
+            save_checkpoint(path, checkpoint_state(grid_data, explore_data))
+            # Counted from the end of the save, so a save longer than the interval doesn't start another one right away
+            last_checkpoint = time.process_time()
+    # The search ended, its checkpoint has nothing left to resume
+    if path and os.path.exists(path):
+        os.remove(path)
+    return explore_data
+
+# Continue the search saved in a checkpoint file until it ends
+def resume(path):
+    grid_data, explore_data = restore_checkpoint(path)
+    print(f"Resuming '{explore_data.algorithm}' on {grid_data.name} from {path}")
+    return run_search(grid_data, explore_data, path)
+
+Task = namedtuple('Task', ['algorithm', 'heuristic', 'grid', 'repetition'])
+
+# Solve one grid with one algorithm and heuristic, logging to a file of its own
+def run_task(task: Task):
+    name = f"{task.algorithm}_{task.heuristic}_{task.grid['name']}_{task.repetition}"
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    log_filename = f"./logs/log_{name}_{timestamp}.txt"
+    # Tasks run side by side, each one writes its tree next to its log
+    tree_filename = f"./logs/tree_{name}_{timestamp}.txt" if config.get('debug_tree', False) else None
+    os.makedirs(os.path.dirname(log_filename), exist_ok=True)
+    handler = logging.FileHandler(log_filename, mode='w')
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger = logging.getLogger()
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    try:
+        start_time = time.process_time()
+        search(load_grid(task.grid), task.algorithm, task.heuristic, name, tree_filename)
+        print(f"Time: {time.process_time() - start_time:.2f}")
+        logging.info(f"Time: {time.process_time() - start_time:.2f}")
+        print("---------------------------------------------------")
+        logging.info("---------------------------------------------------")
+    finally:
+        logger.removeHandler(handler)
+        handler.close()
+    return task
+
+# Average time of past runs in ./results, by (grid name, algorithm, heuristic)
+def past_timings():
+    times = {}
+    for filename in glob.glob('./results/replay_*.json'):
+        with open(filename) as f:
+            result = json.load(f)
+        times.setdefault((result['name'], result['algorithm'], result['heuristic']), []).append(result['time'])
+    return {key: sum(values) / len(values) for key, values in times.items()}
+
+# Every (algorithm, heuristic, grid, repetition) combination, longest first by past timings.
+# Combinations that were never run go first, since nothing says they are short
+def build_tasks(grids):
+    heuristics = config['heuristic'] if isinstance(config['heuristic'], list) else [config['heuristic']]
+    timings = past_timings()
+    tasks = [Task(algorithm, heuristic, grid, repetition)
+             for repetition in range(config['repetitions'])
+             for algorithm in config['algorithms']
+             for heuristic in heuristics
+             for grid in grids]
+    return sorted(tasks, key=lambda task: -timings.get((task.grid['name'], task.algorithm, task.heuristic), float('inf')))
+
+# Solve every grid with every configured algorithm and heuristic, or race the portfolio on each grid when race mode is on
+def run_tasks(grids):
+    if race_config['enabled']:
+        # Every race starts processes of its own, so they run one after the other in the main process
+        for repetition in range(config.get('repetitions', 1)):
+            for grid in grids:
+                run_task(Task('race', 'portfolio', grid, repetition))
+        return
+    tasks = build_tasks(grids)
+    # One pool for every task, sized to the machine. Tasks are handed out one at a time,
+    # so a long one never holds back a batch of short ones
+    with Pool(os.cpu_count(), initializer=apply_config, initargs=(config,)) as p:
+        for _ in p.imap_unordered(run_task, [task for task in tasks if task.algorithm not in parallel_algorithms], chunksize=1):
+            pass
+    for task in tasks:
+        if task.algorithm in parallel_algorithms:
+            run_task(task)
+
+# Maps in a file, either a list of them under 'active' like grid.json or a single map with its name and grid
+def read_grids(path, names=None):
+    with open(path) as f:
+        grids = json.load(f)
+    grids = grids['active'] if 'active' in grids else [grids]
+    if names:
+        missing = set(names) - {grid['name'] for grid in grids}
+        if missing:
+            raise ValueError(f"Maps {sorted(missing)} are not in {path}.")
+        grids = [grid for grid in grids if grid['name'] in names]
+    return grids
+
+# Command line entry point that runs searches without the arcade viewer. Arguments given override the config file
+def main():
+    parser = argparse.ArgumentParser(description="Solve Sokoban maps without the graphical interface")
+    parser.add_argument('--config', help="config file, config.json in the working directory by default")
+    parser.add_argument('--maps', default='grid.json', help="file with the maps, a list under 'active' like grid.json or a single map")
+    parser.add_argument('--map', action='append', dest='names', metavar='NAME', help="only solve this map, can be repeated")
+    parser.add_argument('--algorithm', action='append', dest='algorithms', choices=allowed_algorithms + ['race'], help="algorithm to run, can be repeated")
+    parser.add_argument('--heuristic', action='append', dest='heuristics', type=int, choices=[1, 2, 3, 4, 5], help="heuristic to use, can be repeated")
+    parser.add_argument('--search-mode', choices=allowed_search_modes, help="expand player steps or box pushes")
+    parser.add_argument('--time', type=float, help="wall clock budget of each search in seconds")
+    parser.add_argument('--nodes', type=int, help="expanded node budget of each search")
+    parser.add_argument('--repetitions', type=int, help="times every search is run")
+    args = parser.parse_args()
+
+    if args.config:
+        load_config(args.config)
+    # Overrides go in the config dict itself, it is what worker processes get
+    if args.search_mode:
+        config['search_mode'] = args.search_mode
+    if args.algorithms:
+        if 'race' in args.algorithms and len(args.algorithms) > 1:
+            parser.error("race can't be combined with other algorithms")
+        race_config['enabled'] = args.algorithms == ['race']
+        config['algorithms'] = [algorithm for algorithm in args.algorithms if algorithm != 'race']
+    if args.heuristics:
+        config['heuristic'] = args.heuristics
+    if args.repetitions:
+        config['repetitions'] = args.repetitions
+    if args.time is not None:
+        budget_config['time'] = args.time
+    if args.nodes is not None:
+        budget_config['nodes'] = args.nodes
+    config.setdefault('algorithms', ['a_star'])
+    config.setdefault('heuristic', 1)
+    config.setdefault('repetitions', 1)
+    apply_config(config)
+    run_tasks(read_grids(args.maps, args.names))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import os
+import sys
+import pytest
+
+# Tests run against the maps and config.json in the repository root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(ROOT)
+sys.path.insert(0, ROOT)
+
+import solver
+from grid_aux import load_grid
+
+# Length of the optimal solution of each map in step mode, from a_star with heuristic 1 and no deadlock detection
+OPTIMAL = {'A-1': 38, 'A-2': 78, 'A-3': 86, 'A-4': 122, 'B': 25, 'C': 155}
+
+# Pattern databases are built once per test run, outside the repository
+@pytest.fixture(scope='session')
+def pattern_directory(tmp_path_factory):
+    return str(tmp_path_factory.mktemp('pattern_db'))
+
+# Every test starts from the config in config.json without the solution cache, which would answer from earlier runs
+@pytest.fixture(autouse=True)
+def settings(monkeypatch, pattern_directory):
+    monkeypatch.setattr(solver, 'cache_config', {"enabled": False})
+    monkeypatch.setattr(solver, 'search_mode', 'step')
+    monkeypatch.setitem(solver.config, 'pattern_database', {'directory': pattern_directory})
+
+@pytest.fixture
+def grids():
+    return {grid['name']: grid for grid in solver.read_grids('grid.json')}
+
+# Solutions the searches would write to ./results, as (node, extra) pairs
+@pytest.fixture
+def solutions(monkeypatch):
+    found = []
+    monkeypatch.setattr(solver, 'write_solution', lambda grid_data, data, node, elapsed_time, route=None, bound=None, extra=None: found.append((node, extra)))
+    return found
+
+def start_search(grid, algorithm, heuristic, memory_budget=None):
+    grid_data = load_grid(grid)
+    data = solver.initialize_tree(grid_data, algorithm, heuristic)
+    if memory_budget:
+        data.memory_budget = memory_budget
+    return grid_data, data
+
+# Runs a search step by step up to its first solution, or up to steps steps if given.
+# Returns the solution node (None if there is none yet) and the peak frontier
+def step_search(grid_data, data, steps=float('inf')):
+    peak = 0
+    while steps > 0:
+        steps -= 1
+        node, solved = solver.algorithm_step(grid_data, data)
+        peak = max(peak, len(data.frontier))
+        if solved:
+            return node, peak
+        if data.frontier_node_count == 0 and not solver.search_goes_on(data):
+            break
+    return None, peak
+
+# Runs a whole search, returns the solution node, the tree data and the peak frontier
+def run_search(grid, algorithm, heuristic, memory_budget=None):
+    grid_data, data = start_search(grid, algorithm, heuristic, memory_budget)
+    try:
+        node, peak = step_search(grid_data, data)
+    finally:
+        data.close()
+    return node, data, peak
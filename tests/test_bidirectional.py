@@ -0,0 +1,14 @@
+import solver
+from grid_aux import load_grid
+from bidirectional import bidirectional_search
+from conftest import run_search
+
+# In step mode the bidirectional search still meets on push states, with as few pushes as push mode bfs
+def test_bidirectional_uses_fewest_pushes_in_step_mode(grids, solutions, monkeypatch):
+    for name in ['A-1', 'A-2', 'C']:
+        monkeypatch.setattr(solver, 'search_mode', 'push')
+        bfs, _, _ = run_search(grids[name], 'bfs', 1)
+        monkeypatch.setattr(solver, 'search_mode', 'step')
+        bidirectional_search(load_grid(grids[name]), 1)
+        node, _ = solutions.pop()
+        assert node.depth == bfs.depth
@@ -0,0 +1,42 @@
+import os
+import pytest
+import solver
+from checkpoint import save_checkpoint
+from conftest import OPTIMAL, start_search, step_search
+
+# A search saved halfway and resumed from the checkpoint ends like one that never stopped
+@pytest.mark.parametrize('name, algorithm, memory_budget', [
+    ('A-2', 'a_star', None),
+    ('B', 'bfs', None),
+    ('A-1', 'ida_star', 600),
+    ('A-1', 'ma_star', 30),
+    ('A-2', 'ara_star', None),
+])
+def test_resumed_search_matches_uninterrupted(grids, tmp_path, name, algorithm, memory_budget):
+    grid_data, data = start_search(grids[name], algorithm, 1, memory_budget)
+    node, _ = step_search(grid_data, data)
+    expected = (node.depth, data.expanded_node_count, data.frontier_node_count)
+
+    grid_data, data = start_search(grids[name], algorithm, 1, memory_budget)
+    assert step_search(grid_data, data, expected[1] // 2)[0] is None
+    path = str(tmp_path / 'search.ckpt')
+    save_checkpoint(path, solver.checkpoint_state(grid_data, data))
+    grid_data, data = solver.restore_checkpoint(path)
+    if memory_budget:
+        data.memory_budget = memory_budget
+    node, _ = step_search(grid_data, data)
+    assert (node.depth, data.expanded_node_count, data.frontier_node_count) == expected
+
+# A search out of budget keeps its checkpoint where it stopped, resuming it to the end removes the file
+def test_checkpoint_kept_out_of_budget(grids, tmp_path, monkeypatch, solutions):
+    path = str(tmp_path / 'search.ckpt')
+    monkeypatch.setattr(solver, 'checkpoint_config', {'enabled': True, 'interval': 600, 'directory': str(tmp_path), 'resume': False})
+    monkeypatch.setattr(solver, 'budget_config', {'time': None, 'nodes': 100})
+    data = solver.run_search(*start_search(grids['B'], 'bfs', 1), path)
+    assert os.path.exists(path) and not solutions
+    assert solver.restore_checkpoint(path)[1].expanded_node_count == data.expanded_node_count
+
+    monkeypatch.setattr(solver, 'budget_config', {'time': None, 'nodes': None})
+    solver.resume(path)
+    assert not os.path.exists(path)
+    assert solutions[0][0].depth == OPTIMAL['B']
@@ -0,0 +1,11 @@
+import pytest
+import solver
+from conftest import OPTIMAL, run_search
+
+# Deadlock pruning (frozen boxes and closed off corrals) never cuts off the optimal solution.
+# A-4 is left out, it takes minutes in step mode
+@pytest.mark.parametrize('name', ['A-1', 'A-2', 'A-3', 'B', 'C'])
+def test_a_star_stays_optimal_with_deadlock_pruning(grids, monkeypatch, name):
+    monkeypatch.setattr(solver, 'deadlock_detection', True)
+    node, _, _ = run_search(grids[name], 'a_star', 1)
+    assert node.depth == OPTIMAL[name]
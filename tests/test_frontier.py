@@ -0,0 +1,9 @@
+import pytest
+from conftest import run_search
+
+# A box on a dead square gives the start state an infinite heuristic, the bucket frontier still takes it
+@pytest.mark.parametrize('algorithm', ['a_star', 'greedy'])
+@pytest.mark.parametrize('heuristic', [4, 5])
+def test_unsolvable_start_ends_without_solution(algorithm, heuristic):
+    node, data, _ = run_search({'name': 'dead', 'grid': ['#####', '#$@.#', '#####']}, algorithm, heuristic)
+    assert node is None and data.expanded_node_count == 1
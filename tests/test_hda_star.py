@@ -0,0 +1,10 @@
+from grid_aux import load_grid
+from hda_star import parallel_search
+from conftest import OPTIMAL
+
+# Workers stop once every one of them is idle with nothing in flight, and the solution they agree on is optimal
+def test_hda_star_finds_optimal_solution(grids, solutions):
+    for name in ['A-1', 'A-2', 'C']:
+        parallel_search(load_grid(grids[name]), 1, 3, 16)
+        node, _ = solutions.pop()
+        assert node.depth == OPTIMAL[name]
@@ -0,0 +1,15 @@
+import solver
+from conftest import OPTIMAL, start_search
+
+# Budgets below the transposition table ida_star fills without one (1018 states on A-1, 6756 on B)
+def test_ida_star_solves_with_a_full_transposition_table(grids):
+    for name, budget in [('A-1', 600), ('B', 3000)]:
+        grid_data, data = start_search(grids[name], 'ida_star', 1, budget)
+        peak = 0
+        while True:
+            node, solved = solver.algorithm_step(grid_data, data)
+            peak = max(peak, len(data.transpositions))
+            if solved:
+                break
+        assert peak == budget
+        assert node.depth == OPTIMAL[name]
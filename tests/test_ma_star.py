@@ -0,0 +1,9 @@
+from conftest import OPTIMAL, run_search
+
+# Budgets well below the frontier that A* needs on each map, ma_star has to forget and generate nodes again
+def test_ma_star_solves_below_peak_frontier(grids):
+    for name, budget in [('A-1', 30), ('A-2', 200), ('B', 300)]:
+        _, _, peak = run_search(grids[name], 'a_star', 1)
+        node, _, _ = run_search(grids[name], 'ma_star', 1, budget)
+        assert budget < peak
+        assert node is not None and node.depth == OPTIMAL[name]
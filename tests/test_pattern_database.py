@@ -0,0 +1,12 @@
+import pytest
+import solver
+from conftest import OPTIMAL, run_search
+
+# Heuristic 5 (pattern databases) never overestimates, alone or with deadlock pruning.
+# A-4 is left out, it takes minutes in step mode
+@pytest.mark.parametrize('name', ['A-1', 'A-2', 'A-3', 'B', 'C'])
+@pytest.mark.parametrize('deadlock_detection', [False, True])
+def test_a_star_stays_optimal_with_pattern_databases(grids, monkeypatch, name, deadlock_detection):
+    monkeypatch.setattr(solver, 'deadlock_detection', deadlock_detection)
+    node, _, _ = run_search(grids[name], 'a_star', 5)
+    assert node.depth == OPTIMAL[name]
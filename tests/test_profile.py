@@ -0,0 +1,22 @@
+import glob
+import json
+import pytest
+import solver
+from conftest import start_search
+
+# Searches that end without a solution still write their profile, saying how they ended
+@pytest.mark.parametrize('grid, nodes, outcome', [
+    ({'name': 'dead', 'grid': ['#####', '#$@.#', '#####']}, None, 'no_solution'),
+    (None, 100, 'out_of_budget'),
+])
+def test_profile_written_without_solution(grids, tmp_path, monkeypatch, grid, nodes, outcome):
+    grid_data, data = start_search(grid or grids['B'], 'bfs', 1)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(solver, 'budget_config', {'time': None, 'nodes': nodes})
+    data.profile = solver.Profile(10)
+    solver.run_search(grid_data, data)
+    filenames = glob.glob('results/profile_*.json')
+    assert len(filenames) == 1 and not glob.glob('results/replay_*.json')
+    with open(filenames[0]) as f:
+        profile = json.load(f)
+    assert profile['outcome'] == outcome and profile['expanded_nodes'] == data.expanded_node_count
@@ -0,0 +1,18 @@
+import json
+import solver
+from grid_aux import load_grid
+from race import race_search, member_label
+from conftest import OPTIMAL
+
+# With a single worker the members queue up, and with a deadline every one of them gets to run before one wins
+def test_race_runs_every_member(grids, solutions, monkeypatch, tmp_path):
+    portfolio = [{"algorithm": "greedy", "heuristic": 2}, {"algorithm": "a_star", "heuristic": 1}, {"algorithm": "bfs", "heuristic": 1}]
+    stats = tmp_path / 'race_stats.json'
+    monkeypatch.setattr(solver, 'race_config', {"enabled": True, "portfolio": portfolio, "workers": 1, "deadline": 60, "grace": 5, "stats": str(stats)})
+    race_search(load_grid(grids['A-1']))
+    node, extra = solutions.pop()
+    labels = [member_label(member) for member in portfolio]
+    assert sorted(extra['members']) == sorted(labels)
+    assert {label: record['races'] for label, record in json.loads(stats.read_text())['A-1'].items()} == dict.fromkeys(labels, 1)
+    # The cheapest solution found before the deadline wins
+    assert node.depth == OPTIMAL['A-1']
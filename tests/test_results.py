@@ -0,0 +1,25 @@
+import json
+import os
+import results
+
+def write_replay(filename, cost):
+    with open(filename, 'w') as f:
+        json.dump({'name': 'A-1', 'algorithm': 'bfs', 'heuristic': 1, 'search_mode': 'step', 'cost': cost,
+                   'expanded_nodes': 10, 'frontier_nodes': 5, 'time': 0.5}, f)
+
+# The results store follows the replay files: new ones are added, rewritten ones read again and deleted ones dropped
+def test_store_follows_replay_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs('results')
+    write_replay('results/replay_A-1_bfs_1_0.json', 38)
+    write_replay('results/replay_A-1_bfs_1_1.json', 38)
+    assert list(results.load_results()['cost']) == [38, 38]
+
+    os.remove('results/replay_A-1_bfs_1_0.json')
+    assert list(results.load_results()['cost']) == [38]
+    assert list(results.load_results()['cost']) == [38]
+
+    write_replay('results/replay_A-1_bfs_1_1.json', 400)
+    os.utime('results/replay_A-1_bfs_1_1.json', ns=(0, 0))
+    assert list(results.load_results()['cost']) == [400]
+    assert list(results.pd.read_feather(results.RESULTS_STORE)['cost']) == [400]
@@ -0,0 +1,44 @@
+import random
+from collections import namedtuple
+import pytest
+import solver
+import visited
+from visited import DiskVisitedSet, MemoryVisitedSet
+from conftest import OPTIMAL, run_search
+
+# The disk backed visited set finds the same states as the one in memory, even after spilling and merging many runs.
+# bfs checks whole layers at a time and still expands the same nodes, a_star and greedy do when their block is one node
+@pytest.mark.parametrize('name, algorithm', [('B', 'bfs'), ('A-2', 'a_star'), ('A-2', 'greedy'), ('C', 'dfs')])
+def test_disk_visited_set_matches_memory(grids, monkeypatch, tmp_path, name, algorithm):
+    node, data, _ = run_search(grids[name], algorithm, 1)
+    expected = (node.depth, data.expanded_node_count, data.frontier_node_count)
+    monkeypatch.setattr(solver, 'visited_config', {'backend': 'disk', 'threshold': 500, 'directory': str(tmp_path), 'block': 1})
+    node, data, _ = run_search(grids[name], algorithm, 1)
+    assert (node.depth, data.expanded_node_count, data.frontier_node_count) == expected
+    assert len(data.visited.runs) <= visited.MAX_RUNS
+
+# a_star checking blocks of expanded nodes at a time still finds the optimal solution
+@pytest.mark.parametrize('name', ['A-1', 'A-2', 'B'])
+def test_disk_visited_set_blocks(grids, monkeypatch, tmp_path, name):
+    monkeypatch.setattr(solver, 'visited_config', {'backend': 'disk', 'threshold': 500, 'directory': str(tmp_path), 'block': 50})
+    node, _, _ = run_search(grids[name], 'a_star', 1)
+    assert node.depth == OPTIMAL[name]
+
+# Batches with states repeated inside them and across them, merged in small chunks
+def test_disk_visited_set_batches(monkeypatch, tmp_path):
+    monkeypatch.setattr(visited, 'MERGE_CHUNK', 7)
+    Value = namedtuple('Value', ['key', 'region', 'boxes'])
+    generator = random.Random(1)
+    values = [Value(generator.getrandbits(64), generator.randrange(5), (generator.randrange(100),)) for _ in range(5000)]
+    disk, memory = DiskVisitedSet(300, str(tmp_path)), MemoryVisitedSet()
+    for i in range(0, len(values), 97):
+        batch = values[i:i + 150] + values[max(0, i - 50):i + 10]
+        generator.shuffle(batch)
+        new = disk.new_states(batch)
+        assert new == memory.new_states(batch)
+        disk.add_states([value for value, is_new in zip(batch, new) if is_new])
+        memory.add_states([value for value, is_new in zip(batch, new) if is_new])
+        assert len(disk) == len(memory)
+    assert len(disk.runs) <= visited.MAX_RUNS
+    assert all(value in disk for value in values)
+    disk.close()
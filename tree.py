@@ -1,51 +1,54 @@
-
 class NodeValue:
-    def __init__(self, player_position, boxes_position: list, direction, heuristic=0, depth=0):
-        self.player_position = player_position
-        self.boxes_positions = boxes_position
-        self.heuristic = heuristic
-        self.depth = depth
-        self.direction = direction
+    __slots__ = ('player', 'region', 'boxes', 'key')
+
+    def __init__(self, player, boxes: tuple, key, region=None):
+        # Player and boxes are flattened cell indices, boxes kept as a sorted tuple
+        # key is the Zobrist hash of the state, updated incrementally on every move
+        # region identifies the player for equality, in push mode it is the smallest cell the player can reach
+        self.player = player
+        self.region = player if region is None else region
+        self.boxes = boxes
+        self.key = key
 
     def __eq__(self, other):
-        return self.player_position == other.player_position and self.boxes_positions == other.boxes_positions
-    
+        # Sets only compare states whose keys collide, the full check is kept for those
+        return self.key == other.key and self.region == other.region and self.boxes == other.boxes
+
     def __hash__(self):
-        return hash((self.player_position, tuple(sorted(self.boxes_positions))))
+        return self.key
+
+    def __reduce__(self):
+        return (NodeValue, (self.player, self.boxes, self.key, self.region))
 
     def __str__(self) -> str:
-        return f"{self.direction.name if self.direction else 'Start'} - Player: {self.player_position}, Boxes: {self.boxes_positions}, Heuristic: {self.heuristic}, Depth: {self.depth}"
-    
-    def __lt__(self, other):
-        return self.heuristic < other.heuristic
-    
+        return f"Player: {self.player}, Boxes: {self.boxes}"
+
     def __repr__(self) -> str:
         return self.__str__()
 
+# Search nodes only keep a reference to their parent, so the nodes that are no longer
+# in the frontier or on a frontier node's route are freed as the search goes
 class Node:
-    def __init__(self, value):
+    __slots__ = ('value', 'parent', 'direction', 'depth', 'heuristic')
+
+    def __init__(self, value, parent=None, direction=None, depth=0, heuristic=0):
         self.value = value
-        self.parent = None
-        self.children = []
-
-    def add_child(self, child_node):
-        child_node.parent = self
-        self.children.append(child_node)
-
-    def __repr__(self, level=0):
-        ret = "\t" * level + repr(self.value) + "\n"
-        for child in self.children:
-            ret += child.__repr__(level + 1)
-        return ret
-    
+        self.parent = parent
+        self.direction = direction
+        self.depth = depth
+        self.heuristic = heuristic
+
+    def __repr__(self):
+        return f"{self.direction.name if self.direction else 'Start'} - {self.value}, Heuristic: {self.heuristic}, Depth: {self.depth}"
+
     def __lt__ (self, other):
-        return self.value < other.value
-    
+        return self.heuristic < other.heuristic
+
     def __str__(self):
         return self.__repr__()
-    
+
     def __eq__(self, other):
-        return self.value.__hash__() == other.value.__hash__()
-    
+        return self.value == other.value
+
     def __hash__(self):
-        return self.value.__hash__()
\ No newline at end of file
+        return self.value.__hash__()
@@ -0,0 +1,195 @@
+import os
+import shutil
+import tempfile
+import numpy as np
+
+# Visited state sets. Both share add, add_states, len, in, close and new_states(values), which tells which of a batch of
+# states were never visited, so the disk backed set can look a whole batch of children up at once.
+# A state repeated in a batch is only new the first time
+
+class MemoryVisitedSet(set):
+    def new_states(self, values):
+        new = []
+        batch = set()
+        for value in values:
+            new.append(value not in self and value not in batch)
+            batch.add(value)
+        return new
+
+    def add_states(self, values):
+        self.update(values)
+
+    def close(self):
+        pass
+
+# States are packed into 16 bytes, the Zobrist key and a second hash of the region and boxes,
+# so two different states are only taken as the same one if both 64 bit hashes collide.
+# The lowest bit of the check is always set, an empty slot of the hash table is all zeros
+PACKED_STATE = np.dtype([('key', '<u8'), ('check', '<u8')])
+CHECK_MASK = (1 << 64) - 1
+
+def pack_states(values):
+    return np.array([(value.key, hash((value.region, value.boxes)) & CHECK_MASK | 1) for value in values], dtype=PACKED_STATE)
+
+# Open addressing hash table of packed states with linear probing, grown by doubling before it gets half full.
+# Every operation takes a whole batch, probing all of its states together one slot further at a time
+class PackedTable:
+    def __init__(self, capacity=1024):
+        self.slots = np.zeros(capacity, dtype=PACKED_STATE)
+        self.count = 0
+
+    # Whether each state is in the table, and the slot it is in or the empty slot that ends its probe
+    def probe(self, packed):
+        mask = len(self.slots) - 1
+        slots = (packed['key'] & np.uint64(mask)).astype(np.intp)
+        found = np.zeros(len(packed), dtype=bool)
+        pending = np.arange(len(packed))
+        while len(pending):
+            entries = self.slots[slots[pending]]
+            hit = entries == packed[pending]
+            found[pending[hit]] = True
+            pending = pending[~hit & (entries['check'] != 0)]
+            slots[pending] = (slots[pending] + 1) & mask
+        return found, slots
+
+    # Adds states that are neither in the table nor repeated
+    def insert(self, packed):
+        self.count += len(packed)
+        if self.count * 2 > len(self.slots):
+            capacity = len(self.slots)
+            while self.count * 2 > capacity:
+                capacity *= 2
+            occupied = self.states()
+            self.slots = np.zeros(capacity, dtype=PACKED_STATE)
+            self.place(occupied)
+        self.place(packed)
+
+    # States probing to the same empty slot take turns, the first one of each slot is written and the rest probe again
+    def place(self, packed):
+        while len(packed):
+            _, slots = self.probe(packed)
+            _, first = np.unique(slots, return_index=True)
+            self.slots[slots[first]] = packed[first]
+            packed = np.delete(packed, first)
+
+    def states(self):
+        return self.slots[self.slots['check'] != 0]
+
+# Sorted runs are merged into one once there are more than this many, so a lookup reads a few runs at most
+MAX_RUNS = 4
+# States read from each run at a time while merging
+MERGE_CHUNK = 1 << 20
+
+# Merges sorted runs of states into the file at path, a chunk of every run at a time. Everything up to the smallest
+# last state of the chunks is in its final place once sorted, the rest of the chunks is read again in the next round
+def merge_runs(runs, path):
+    merged = np.lib.format.open_memmap(path, mode='w+', dtype=PACKED_STATE, shape=(sum(len(run) for run in runs),))
+    positions = [0] * len(runs)
+    written = 0
+    while written < len(merged):
+        chunks = [run[position:position + MERGE_CHUNK] for run, position in zip(runs, positions)]
+        lasts = [chunk[-1] for run, position, chunk in zip(runs, positions, chunks) if position + len(chunk) < len(run)]
+        cutoff = np.sort(np.array(lasts, dtype=PACKED_STATE))[0] if lasts else None
+        ready = []
+        for i, chunk in enumerate(chunks):
+            count = len(chunk) if cutoff is None else np.searchsorted(chunk, cutoff, side='right')
+            ready.append(chunk[:count])
+            positions[i] += count
+        part = np.sort(np.concatenate(ready))
+        merged[written:written + len(part)] = part
+        written += len(part)
+    merged.flush()
+    del merged
+
+# Visited set that keeps the newest states packed in a hash table in memory and spills them to a sorted run file on
+# disk every time threshold of them pile up. Run files are memory mapped and searched with a binary search for a whole
+# batch of states at a time (delayed duplicate detection), and merged k-way once there are more than MAX_RUNS of them
+class DiskVisitedSet:
+    def __init__(self, threshold, directory):
+        self.threshold = threshold
+        self.directory = directory
+        self.path = None
+        self.memory = PackedTable()
+        self.runs = []
+        self.run_count = 0
+        self.spilled_count = 0
+
+    def run_filename(self):
+        self.run_count += 1
+        return os.path.join(self.path, f"run_{self.run_count}.npy")
+
+    def spill(self):
+        if self.path is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self.path = tempfile.mkdtemp(prefix='visited_', dir=self.directory)
+        run = self.memory.states()
+        run.sort()
+        filename = self.run_filename()
+        np.save(filename, run)
+        self.runs.append(np.load(filename, mmap_mode='r'))
+        self.spilled_count += len(run)
+        self.memory = PackedTable(len(self.memory.slots))
+        if len(self.runs) > MAX_RUNS:
+            self.merge()
+
+    def merge(self):
+        filename = self.run_filename()
+        merge_runs(self.runs, filename)
+        old = [run.filename for run in self.runs]
+        self.runs = [np.load(filename, mmap_mode='r')]
+        for run in old:
+            os.remove(run)
+
+    def on_disk(self, packed):
+        found = np.zeros(len(packed), dtype=bool)
+        for run in self.runs:
+            indices = np.searchsorted(run, packed)
+            inside = indices < len(run)
+            found[inside] |= run[indices[inside]] == packed[inside]
+        return found
+
+    def new_states(self, values):
+        if not values:
+            return []
+        packed = pack_states(values)
+        _, first = np.unique(packed, return_index=True)
+        candidates = packed[first]
+        unseen = ~self.memory.probe(candidates)[0]
+        if self.runs:
+            unseen[unseen] = ~self.on_disk(candidates[unseen])
+        new = np.zeros(len(values), dtype=bool)
+        new[first[unseen]] = True
+        return new.tolist()
+
+    def __contains__(self, value):
+        return not self.new_states([value])[0]
+
+    # Adds states that new_states found new, each one once
+    def add_states(self, values):
+        if not values:
+            return
+        self.memory.insert(pack_states(values))
+        if self.memory.count >= self.threshold:
+            self.spill()
+
+    def add(self, value):
+        self.add_states([value])
+
+    def __len__(self):
+        return self.memory.count + self.spilled_count
+
+    # Run files are reopened by path, so a checkpoint only holds the states still in memory
+    def __getstate__(self):
+        state = dict(vars(self))
+        state['runs'] = [run.filename for run in self.runs]
+        return state
+
+    def __setstate__(self, state):
+        vars(self).update(state)
+        self.runs = [np.load(filename, mmap_mode='r') for filename in self.runs]
+
+    def close(self):
+        self.runs = []
+        if self.path:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.path = None